@@ -0,0 +1,148 @@
+import threading
+from datetime import date, timedelta
+
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def parse_iso_date(value):
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+class CalendarMaterializer:
+    def __init__(self, kb):
+        self.kb = kb
+        self._lock = threading.Lock()
+        self._kb_version = getattr(kb, "version", None)
+        self._holidays = None
+        self._term = None
+        self._schedules = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def _check_version(self):
+        version = getattr(self.kb, "version", None)
+        if version != self._kb_version:
+            self.clear()
+            self._kb_version = version
+    
+    def clear(self):
+        with self._lock:
+            self._holidays = None
+            self._term = None
+            self._schedules = {}
+    
+    def _holiday_map(self):
+        if self._holidays is None:
+            holidays = {}
+            for year, days in self.kb.holidays.items():
+                for month_day, name in days.items():
+                    day = parse_iso_date(f"{year}-{month_day}")
+                    if day:
+                        holidays[day] = name
+            self._holidays = holidays
+        return self._holidays
+    
+    def _exam_ranges(self, dept, sem):
+        ranges = []
+        for exam_type in self.kb.exams:
+            exam = self.kb.get_exam_schedule(exam_type, dept, sem)
+            if not exam:
+                continue
+            start = parse_iso_date(exam.get("start_date"))
+            end = parse_iso_date(exam.get("end_date")) or start
+            if start:
+                ranges.append((start, end, exam_type, exam.get("subjects", [])))
+        return ranges
+    
+    def term_range(self):
+        if self._term is None:
+            years = {day.year for day in self._holiday_map()}
+            for depts in self.kb.exams.values():
+                for sems in depts.values():
+                    for exam in sems.values():
+                        for key in ("start_date", "end_date"):
+                            day = parse_iso_date(exam.get(key))
+                            if day:
+                                years.add(day.year)
+            if not years:
+                years = {date.today().year}
+            self._term = (date(min(years), 1, 1), date(max(years), 12, 31))
+        return self._term
+    
+    def _day_entry(self, day, week, holidays, exams):
+        holiday = holidays.get(day)
+        exams_today = [
+            {"exam_type": exam_type, "subjects": subjects}
+            for start, end, exam_type, subjects in exams
+            if start <= day <= end
+        ]
+        weekday = WEEKDAYS[day.weekday()]
+        classes = [] if holiday or exams_today else list(week.get(weekday) or [])
+        return {"date": day, "weekday": weekday, "holiday": holiday, "exams": exams_today, "classes": classes}
+    
+    def _materialize(self, dept, sem, week):
+        holidays = self._holiday_map()
+        exams = self._exam_ranges(dept, sem)
+        start, end = self.term_range()
+        schedule = {}
+        day = start
+        while day <= end:
+            schedule[day] = self._day_entry(day, week, holidays, exams)
+            day += timedelta(days=1)
+        return schedule
+    
+    def get_schedule(self, dept, sem):
+        self._check_version()
+        dept = dept.upper()
+        key = (dept, sem)
+        with self._lock:
+            schedule = self._schedules.get(key)
+            if schedule is not None:
+                self.hits += 1
+                return schedule
+            self.misses += 1
+        
+        week = self.kb.get_timetable(dept, sem)
+        if not week:
+            return None
+        schedule = self._materialize(dept, sem, week)
+        with self._lock:
+            self._schedules[key] = schedule
+        return schedule
+    
+    def get_day(self, dept, sem, day):
+        day = parse_iso_date(day)
+        schedule = self.get_schedule(dept, sem)
+        if schedule is None or day is None:
+            return None
+        entry = schedule.get(day)
+        if entry is None:
+            week = self.kb.get_timetable(dept, sem) or {}
+            entry = self._day_entry(day, week, self._holiday_map(), self._exam_ranges(dept.upper(), sem))
+        return entry
+    
+    def get_week(self, dept, sem, day):
+        monday = week_start(parse_iso_date(day))
+        entries = [self.get_day(dept, sem, monday + timedelta(days=i)) for i in range(7)]
+        return entries if all(entries) else None
+    
+    def get_stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "schedules": len(self._schedules),
+                "days": sum(len(s) for s in self._schedules.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0
+            }
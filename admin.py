@@ -3,6 +3,8 @@ import json
 import os
 from datetime import datetime
 from knowledge_base import KnowledgeBase
+from tenants import TenantRegistry
+from analytics import AnalyticsRollup, DEFAULT_LOG_PATH
 
 
 def load_json_file(filepath):
@@ -16,11 +18,20 @@ def load_json_file(filepath):
         return {}
 
 
-def save_json_file(filepath, data):
+def save_json_file(filepath, data, registry=None, tenant_id=None):
     os.makedirs(os.path.dirname(filepath) if os.path.dirname(filepath) else '.', exist_ok=True)
     with open(filepath, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
-    st.success(f"Saved to {filepath}")
+    # Workers only watch the snapshot's version counter, so the save publishes a new snapshot
+    if registry is not None and registry.rebuild_snapshot(tenant_id):
+        st.success(f"Saved to {filepath} and rebuilt the shared snapshot")
+    else:
+        st.success(f"Saved to {filepath}")
+
+
+@st.cache_resource
+def get_analytics_rollup():
+    return AnalyticsRollup(os.getenv("ANALYTICS_LOG", DEFAULT_LOG_PATH))
 
 
 def main():
@@ -51,8 +62,10 @@ def main():
         st.session_state.admin_authenticated = False
         st.rerun()
     
-    data_dir = "data"
-    tabs = st.tabs(["Timetable", "Exams", "Holidays", "Academic Rules", "View All Data"])
+    registry = TenantRegistry(root=os.getenv("TENANTS_DIR", "tenants"), snapshot_path=os.getenv("KB_SNAPSHOT"))
+    tenant_id = st.sidebar.selectbox("College", registry.list_tenants())
+    data_dir = registry.data_dir(tenant_id)
+    tabs = st.tabs(["Timetable", "Exams", "Holidays", "Academic Rules", "View All Data", "Analytics"])
     
     with tabs[0]:
         st.header("Edit Timetable")
@@ -90,7 +103,7 @@ def main():
                     if classes_input:
                         classes = [c.strip() for c in classes_input.replace('\n', ',').split(',') if c.strip()]
                         timetable_data[dept_upper][new_sem][selected_day] = classes
-                        save_json_file(timetable_file, timetable_data)
+                        save_json_file(timetable_file, timetable_data, registry, tenant_id)
                     else:
                         st.warning("Please enter at least one class")
                 else:
@@ -142,7 +155,7 @@ def main():
                         "end_date": end_date.strftime("%Y-%m-%d"),
                         "subjects": subjects
                     }
-                    save_json_file(exams_file, exams_data)
+                    save_json_file(exams_file, exams_data, registry, tenant_id)
                 else:
                     st.error("Please fill all required fields")
         
@@ -172,7 +185,7 @@ def main():
                     
                     month_day = holiday_date.strftime("%m-%d")
                     holidays_data[year][month_day] = holiday_name
-                    save_json_file(holidays_file, holidays_data)
+                    save_json_file(holidays_file, holidays_data, registry, tenant_id)
                 else:
                     st.error("Please enter holiday name")
         
@@ -232,7 +245,7 @@ def main():
                 "office_location": hod_location
             }
             
-            save_json_file(rules_file, rules_data)
+            save_json_file(rules_file, rules_data, registry, tenant_id)
     
     with tabs[4]:
         st.header("View All Knowledge Base Data")
@@ -247,6 +260,47 @@ def main():
         st.write(f"Exam types: {len(exams_data)}")
         st.write(f"Holiday years: {len(holidays_data)}")
         st.write(f"Rules configured: Yes" if rules_data else "Rules configured: No")
+    
+    with tabs[5]:
+        st.header("Chat Analytics")
+        
+        rollup = get_analytics_rollup()
+        new_events = rollup.update()
+        window = st.selectbox("Time window", [24, 72, 168], format_func=lambda h: f"Last {h // 24} day(s)" if h >= 48 else "Last 24 hours", key="analytics_window")
+        summary = rollup.summary(tenant_id, hours=window)
+        
+        if not summary:
+            st.info("No chat traffic recorded for this college yet.")
+        else:
+            st.caption(f"{new_events} new events since the last refresh")
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Questions", summary["events"])
+            col2.metric("Unanswered", f"{summary['unanswered_rate']:.1%}")
+            col3.metric("Fallback", f"{summary['fallback_rate']:.1%}")
+            col4.metric("p95 latency", f"≤ {summary['latency_ms']['p95_upper']:g} ms")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.subheader("Intent Mix")
+                st.bar_chart({"questions": summary["intents"]})
+            with col2:
+                st.subheader("Departments")
+                if summary["departments"]:
+                    st.bar_chart({"questions": summary["departments"]})
+                else:
+                    st.write("No department mentioned yet")
+            
+            st.subheader("Top Unanswered Queries")
+            if summary["top_unanswered"]:
+                st.table([{"query": query, "count": count} for query, count in summary["top_unanswered"]])
+            else:
+                st.write("No unanswered queries in this window")
+            
+            st.subheader("Per Hour")
+            st.dataframe([
+                dict(row, top_unanswered=", ".join(f"{q} ({n})" for q, n in row["top_unanswered"]))
+                for row in reversed(summary["hours"])
+            ], use_container_width=True)
 
 
 if __name__ == "__main__":
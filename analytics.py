@@ -0,0 +1,279 @@
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+from answer_engine import FALLBACK_SOURCES
+from response_templates import JSON_ENCODER
+
+
+DEFAULT_LOG_PATH = os.path.join("logs", "analytics.jsonl")
+UNANSWERED_SOURCES = {"unavailable", "rate_limited", "timeout"}
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+def hour_key(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:00")
+
+
+def make_event(tenant_id, session_id, query, answer, latency, ts=None):
+    source = answer.get("source")
+    return {
+        "ts": round(time.time() if ts is None else ts, 3),
+        "tenant": tenant_id,
+        "session": session_id,
+        "query": answer.get("normalized_query") or query,
+        "intent": answer.get("intent"),
+        "confidence": round(answer.get("confidence") or 0.0, 3),
+        "entities": {k: v for k, v in (answer.get("entities") or {}).items() if v is not None},
+        "source": source,
+        "fallback": source in FALLBACK_SOURCES,
+        "answered": source not in UNANSWERED_SOURCES,
+        "latency_ms": round(latency * 1000, 2)
+    }
+
+
+class AnalyticsLog:
+    def __init__(self, path=DEFAULT_LOG_PATH, max_pending=10000):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self.stats = {"recorded": 0, "written": 0, "dropped": 0}
+        self._writer = threading.Thread(target=self._write_loop, name="analytics-writer", daemon=True)
+        self._writer.start()
+    
+    def record(self, tenant_id, session_id, query, answer, latency):
+        event = make_event(tenant_id, session_id, query, answer, latency)
+        try:
+            # Chat turns never wait on analytics; a full queue drops the event instead
+            self._queue.put_nowait(event)
+        except queue.Full:
+            with self._lock:
+                self.stats["dropped"] += 1
+            return False
+        with self._lock:
+            self.stats["recorded"] += 1
+        return True
+    
+    def _write_loop(self):
+        while True:
+            events = [self._queue.get()]
+            while True:
+                try:
+                    events.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            data = "".join(JSON_ENCODER.encode(event) + "\n" for event in events).encode("utf-8")
+            try:
+                # One O_APPEND write per batch keeps lines from several worker processes intact
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, data)
+                finally:
+                    os.close(fd)
+                with self._lock:
+                    self.stats["written"] += len(events)
+            except OSError:
+                with self._lock:
+                    self.stats["dropped"] += len(events)
+            finally:
+                for _ in events:
+                    self._queue.task_done()
+    
+    def flush(self):
+        self._queue.join()
+    
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats["pending"] = self._queue.qsize()
+        return stats
+
+
+def _empty_counts():
+    return {
+        "events": 0,
+        "fallbacks": 0,
+        "unanswered": 0,
+        "latency_ms_total": 0.0,
+        "latency_buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+        "intents": {},
+        "departments": {},
+        "sources": {}
+    }
+
+
+def _bump(counts, key, amount=1):
+    counts[key] = counts.get(key, 0) + amount
+
+
+def latency_percentile(buckets, pct):
+    total = sum(buckets)
+    if not total:
+        return 0.0
+    target = pct / 100.0 * total
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS_MS + [float("inf")], buckets):
+        seen += count
+        if seen >= target:
+            return bound
+    return float("inf")
+
+
+class AnalyticsRollup:
+    def __init__(self, log_path=DEFAULT_LOG_PATH, checkpoint_path=None, retention_hours=168, top_queries=100):
+        self.log_path = log_path
+        self.checkpoint_path = checkpoint_path or os.path.splitext(log_path)[0] + ".rollup.json"
+        self.retention_hours = retention_hours
+        self.top_queries = top_queries
+        self._lock = threading.Lock()
+        self._reset()
+        self._load_checkpoint()
+    
+    def _reset(self):
+        self.offset = 0
+        self.file_id = None
+        self.tenants = {}
+    
+    def _load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("log_path") == self.log_path:
+            self.offset = state["offset"]
+            self.file_id = state["file_id"]
+            self.tenants = state["tenants"]
+    
+    def save(self):
+        state = {"log_path": self.log_path, "offset": self.offset, "file_id": self.file_id, "tenants": self.tenants}
+        directory = os.path.dirname(os.path.abspath(self.checkpoint_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".rollup-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp_path, self.checkpoint_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    
+    def _tenant(self, tenant_id):
+        rollup = self.tenants.get(tenant_id)
+        if rollup is None:
+            rollup = self.tenants[tenant_id] = {"totals": _empty_counts(), "hours": {}}
+        return rollup
+    
+    def apply(self, event):
+        rollup = self._tenant(event.get("tenant") or "default")
+        hour = hour_key(event["ts"])
+        hourly = rollup["hours"].get(hour)
+        if hourly is None:
+            hourly = rollup["hours"][hour] = dict(_empty_counts(), unanswered_queries={})
+        
+        latency = event.get("latency_ms", 0.0)
+        bucket = bisect_left(LATENCY_BUCKETS_MS, latency)
+        for counts in (rollup["totals"], hourly):
+            counts["events"] += 1
+            counts["fallbacks"] += bool(event.get("fallback"))
+            counts["unanswered"] += not event.get("answered", True)
+            counts["latency_ms_total"] += latency
+            counts["latency_buckets"][bucket] += 1
+            _bump(counts["intents"], str(event.get("intent")))
+            _bump(counts["sources"], str(event.get("source")))
+            department = (event.get("entities") or {}).get("department")
+            if department:
+                _bump(counts["departments"], department)
+        
+        if not event.get("answered", True):
+            queries = hourly["unanswered_queries"]
+            _bump(queries, event.get("query") or "")
+            # Trim occasionally rather than on every event; only the head of the list is ever shown
+            if len(queries) > 2 * self.top_queries:
+                hourly["unanswered_queries"] = dict(Counter(queries).most_common(self.top_queries))
+    
+    def _prune(self):
+        cutoff = hour_key(time.time() - self.retention_hours * 3600)
+        for rollup in self.tenants.values():
+            for hour in [h for h in rollup["hours"] if h < cutoff]:
+                del rollup["hours"][hour]
+    
+    def update(self):
+        with self._lock:
+            try:
+                stat = os.stat(self.log_path)
+            except OSError:
+                return 0
+            
+            # A rotated or truncated log is re-read from the start
+            if self.file_id != stat.st_ino or stat.st_size < self.offset:
+                self._reset()
+                self.file_id = stat.st_ino
+            if stat.st_size == self.offset:
+                return 0
+            
+            applied = 0
+            with open(self.log_path, "rb") as f:
+                f.seek(self.offset)
+                for line in f:
+                    # A partially written last line is picked up on the next update
+                    if not line.endswith(b"\n"):
+                        break
+                    self.offset += len(line)
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.apply(event)
+                    applied += 1
+            
+            self._prune()
+            self.save()
+            return applied
+    
+    def summary(self, tenant_id="default", hours=24, top=10):
+        with self._lock:
+            rollup = self.tenants.get(tenant_id)
+            if rollup is None:
+                return None
+            cutoff = hour_key(time.time() - hours * 3600)
+            recent = sorted((h, c) for h, c in rollup["hours"].items() if h >= cutoff)
+            totals = rollup["totals"]
+            
+            unanswered = Counter()
+            for _, counts in recent:
+                unanswered.update(counts["unanswered_queries"])
+            
+            events = totals["events"]
+            return {
+                "events": events,
+                "fallback_rate": totals["fallbacks"] / events if events else 0.0,
+                "unanswered_rate": totals["unanswered"] / events if events else 0.0,
+                "latency_ms": {
+                    "mean": totals["latency_ms_total"] / events if events else 0.0,
+                    "p50_upper": latency_percentile(totals["latency_buckets"], 50),
+                    "p95_upper": latency_percentile(totals["latency_buckets"], 95)
+                },
+                "intents": dict(Counter(totals["intents"]).most_common()),
+                "departments": dict(Counter(totals["departments"]).most_common()),
+                "sources": dict(Counter(totals["sources"]).most_common()),
+                "top_unanswered": unanswered.most_common(top),
+                "hours": [
+                    {
+                        "hour": hour,
+                        "events": counts["events"],
+                        "unanswered": counts["unanswered"],
+                        "fallbacks": counts["fallbacks"],
+                        "mean_latency_ms": round(counts["latency_ms_total"] / counts["events"], 2) if counts["events"] else 0.0,
+                        "top_unanswered": Counter(counts["unanswered_queries"]).most_common(3)
+                    }
+                    for hour, counts in recent
+                ]
+            }
@@ -0,0 +1,291 @@
+from datetime import datetime, timedelta
+from knowledge_base import KnowledgeBase
+from kb_snapshot import SnapshotKnowledgeBase
+from intent_detector import IntentDetector
+from entity_extractor import EntityExtractor
+from kb_retriever import KBRetriever
+from query_normalizer import QueryNormalizer
+from nlu_cache import NLUCache
+from token_budget import TokenBudget
+from llm_fallback import LLMFallback
+from llm_dispatcher import LLMDispatcher, PRIORITY_KB, PRIORITY_OPEN
+from kb_first_fallback import KBFirstFallback
+from academic_calendar import CalendarMaterializer, week_start
+from response_templates import render, FORMATS
+
+
+FALLBACK_SOURCES = {"relaxed_kb", "llm", "timeout", "unavailable", "rate_limited"}
+
+
+def exam_title(exam_type):
+    return exam_type.replace("_", " ").title()
+
+
+class AnswerEngine:
+    def __init__(self, kb, retriever, normalizer, nlu_cache, llm, fallback=None, budget=None, calendar=None, response_format="text", rate_limiter=None):
+        if response_format not in FORMATS:
+            raise ValueError(f"Unknown response format: {response_format}. Available: {', '.join(FORMATS)}")
+        self.kb = kb
+        self.retriever = retriever
+        self.normalizer = normalizer
+        self.nlu_cache = nlu_cache
+        self.llm = llm
+        self.fallback = fallback or KBFirstFallback()
+        self.budget = budget or TokenBudget()
+        self.calendar = calendar or CalendarMaterializer(kb)
+        self.response_format = response_format
+        self.rate_limiter = rate_limiter
+    
+    @classmethod
+    def create(cls, data_dir="data", provider="ollama", model="llama2", snapshot_path=None, response_format="text", rate_limiter=None, **llm_options):
+        if snapshot_path:
+            kb = SnapshotKnowledgeBase.open(data_dir, snapshot_path)
+        else:
+            kb = KnowledgeBase(data_dir)
+        retriever = KBRetriever(kb)
+        intent_detector = IntentDetector()
+        entity_extractor = EntityExtractor()
+        budget = TokenBudget()
+        return cls(
+            kb,
+            retriever,
+            QueryNormalizer.from_nlu(intent_detector, entity_extractor, known_words=retriever.idf),
+            NLUCache(intent_detector, entity_extractor),
+            LLMDispatcher(LLMFallback(provider=provider, model=model, budget=budget, **llm_options)),
+            KBFirstFallback(),
+            budget,
+            response_format=response_format,
+            rate_limiter=rate_limiter
+        )
+    
+    def render_calendar_day(self, entry):
+        if entry["holiday"]:
+            template = "calendar_holiday"
+        elif entry["exams"]:
+            template = "calendar_exams"
+        elif entry["classes"]:
+            template = "calendar_day"
+        else:
+            template = "calendar_empty"
+        return render(template, {
+            "label": f"{entry['weekday']}, {entry['date'].isoformat()}",
+            "date": entry["date"],
+            "weekday": entry["weekday"],
+            "holiday": entry["holiday"],
+            "classes": entry["classes"],
+            "exams": [{"exam_name": exam_title(e["exam_type"]), "subjects": e["subjects"]} for e in entry["exams"]]
+        }, self.response_format)
+    
+    def render_calendar_week(self, entries, dept, sem):
+        days = []
+        for entry in entries:
+            if entry["holiday"]:
+                summary = f" Holiday ({entry['holiday']})"
+            elif entry["exams"]:
+                summary = " " + ", ".join(exam_title(e["exam_type"]) for e in entry["exams"]) + " Exams"
+            elif entry["classes"]:
+                summary = ""
+            else:
+                continue
+            days.append({
+                "weekday": entry["weekday"],
+                "date": entry["date"],
+                "summary": summary,
+                "holiday": entry["holiday"],
+                "classes": entry["classes"]
+            })
+        return render("calendar_week", {
+            "department": dept,
+            "semester": sem,
+            "week_start": entries[0]["date"],
+            "days": days
+        }, self.response_format)
+    
+    def get_relaxed_kb_answer(self, query):
+        matches = self.retriever.find_confident_matches(query)
+        if not matches:
+            return None
+        return "Here's what I found in the college records:\n\n" + "\n".join([f"  {m}" for m in matches])
+    
+    def rephrase_message(self, context):
+        suggestions = []
+        if context.get("last_intent"):
+            suggestions.append(f"You were asking about {context.get('last_intent')}.")
+        if context.get("department"):
+            suggestions.append(f"Department: {context.get('department')}")
+        if context.get("semester"):
+            suggestions.append(f"Semester: {context.get('semester')}")
+        
+        msg = "I'm having trouble understanding your query."
+        if suggestions:
+            msg += " " + " ".join(suggestions)
+        msg += " Please try rephrasing your question or use one of the FAQ buttons in the sidebar."
+        return msg
+    
+    def get_answer(self, query, context, history=None, session_id=None):
+        return self.answer(query, context, history, session_id=session_id)["response"]
+    
+    def answer(self, query, context, history=None, stream=False, session_id=None):
+        normalized_query = self.normalizer.normalize(query)
+        intent, confidence, entities = self.nlu_cache.analyze(normalized_query)
+        
+        dept = entities.get("department") or context.get("department")
+        sem = entities.get("semester") or context.get("semester")
+        day = entities.get("day")
+        date = entities.get("date")
+        exam_type = entities.get("exam_type") or context.get("exam_type")
+        week = entities.get("week")
+        
+        def result(response, source):
+            return {
+                "response": response,
+                "source": source,
+                "intent": intent,
+                "confidence": confidence,
+                "entities": entities,
+                "normalized_query": normalized_query
+            }
+        
+        def reply(source, template, **values):
+            return result(render(template, values, self.response_format), source)
+        
+        if dept:
+            context["department"] = dept
+        if sem:
+            context["semester"] = sem
+        if intent:
+            context["last_intent"] = intent
+        
+        if not intent or confidence < 0.3:
+            if context.get("last_intent"):
+                if dept or sem or day or date or week:
+                    intent = context.get("last_intent")
+                    confidence = 0.5
+        
+        if intent == "timetable" and confidence > 0.3:
+            if not dept:
+                if context.get("department"):
+                    dept = context["department"]
+                else:
+                    return reply("clarify", "message", text="I need to know which department you're asking about. Please specify (e.g., CSE, ECE).")
+            
+            if not sem:
+                if context.get("semester"):
+                    sem = context["semester"]
+                else:
+                    return reply("clarify", "message", text="I need to know which semester. Please specify (e.g., Semester 3).")
+            
+            if week:
+                start = week_start(datetime.now().date()) + timedelta(days=7 if week == "next_week" else 0)
+                entries = self.calendar.get_week(dept, sem, start)
+                if entries:
+                    return result(self.render_calendar_week(entries, dept, sem), "kb")
+            elif date:
+                entry = self.calendar.get_day(dept, sem, date)
+                if entry:
+                    return result(self.render_calendar_day(entry), "kb")
+            
+            timetable_data = self.kb.get_timetable(dept, sem, day)
+            
+            if timetable_data:
+                if day:
+                    classes = timetable_data if isinstance(timetable_data, list) else None
+                    if classes:
+                        return reply("kb", "timetable_day", day=day, classes=classes)
+                    else:
+                        return reply("kb", "timetable_no_classes", day=day, department=dept, semester=sem)
+                else:
+                    days = [{"day": day_name, "classes": classes} for day_name, classes in timetable_data.items() if classes]
+                    return reply("kb", "timetable_week", department=dept, semester=sem, days=days)
+            else:
+                return reply("kb", "message", text=f"Sorry, I couldn't find timetable information for {dept} {sem}. Please check if the department and semester are correct.")
+        
+        elif intent == "exam" and confidence > 0.3:
+            if not exam_type:
+                exam_type = "mid_semester"
+            
+            if not dept:
+                if context.get("department"):
+                    dept = context["department"]
+                else:
+                    return reply("clarify", "message", text="I need to know which department. Please specify (e.g., CSE, ECE).")
+            
+            if not sem:
+                if context.get("semester"):
+                    sem = context["semester"]
+                else:
+                    return reply("clarify", "message", text="I need to know which semester. Please specify (e.g., Semester 3).")
+            
+            exam_data = self.kb.get_exam_schedule(exam_type, dept, sem)
+            
+            if exam_data:
+                return reply("kb", "exam", exam_type=exam_type, exam_name=exam_title(exam_type), department=dept, semester=sem, **exam_data)
+            else:
+                return reply("kb", "message", text=f"Sorry, I couldn't find {exam_type} exam schedule for {dept} {sem}.")
+        
+        elif intent == "holiday" and confidence > 0.3:
+            if date:
+                holiday_name = self.kb.check_holiday(date)
+                if holiday_name:
+                    return reply("kb", "holiday", when=date, date=date, holiday=holiday_name)
+                else:
+                    return reply("kb", "not_holiday", when=date, date=date)
+            else:
+                tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+                holiday_name = self.kb.check_holiday(tomorrow)
+                if holiday_name:
+                    return reply("kb", "holiday", when=f"tomorrow ({tomorrow})", date=tomorrow, holiday=holiday_name)
+                else:
+                    return reply("kb", "not_holiday", when=f"tomorrow ({tomorrow})", date=tomorrow)
+        
+        elif intent == "credits" and confidence > 0.3:
+            return reply("kb", "credits", **self.kb.get_credit_requirements())
+        
+        elif intent == "attendance" and confidence > 0.3:
+            attendance_info = self.kb.get_attendance_rules()
+            return reply("kb", "attendance", threshold=attendance_info.get("minimum_percentage", 75), **attendance_info)
+        
+        elif intent == "contact" and confidence > 0.3:
+            if not dept:
+                dept = entities.get("department") or context.get("department")
+                if not dept:
+                    return reply("clarify", "message", text="I need to know which department. Please specify (e.g., CSE, ECE).")
+            
+            contact_info = self.kb.get_department_contact(dept)
+            
+            if contact_info:
+                return reply("kb", "contact", department=dept, **contact_info)
+            else:
+                return reply("kb", "message", text=f"Sorry, I couldn't find contact information for {dept} department.")
+        
+        else:
+            if context.get("last_intent") == "timetable" and (dept or context.get("department")):
+                return reply("clarify", "message", text="I have the department. Please also specify the semester (e.g., Semester 3).")
+            
+            relaxed_answer = lambda: self.get_relaxed_kb_answer(normalized_query)
+            
+            if not self.llm.is_available():
+                kb_answer = relaxed_answer()
+                if kb_answer:
+                    return reply("relaxed_kb", "message", text=kb_answer)
+                return reply("unavailable", "message", text=self.rephrase_message(context))
+            
+            # Only a query the relaxed match could not answer spends a rate limit token
+            admit = (lambda: self.rate_limiter.allow(session_id)) if self.rate_limiter else None
+            
+            context_str = f"Department: {context.get('department')}, Semester: {context.get('semester')}"
+            kb_snippets = self.retriever.build_context(query, token_budget=self.budget.knowledge_tokens)
+            if kb_snippets:
+                context_str += f"\n\nRelevant college information:\n{kb_snippets}"
+            priority = PRIORITY_KB if kb_snippets else PRIORITY_OPEN
+            history_str = self.budget.fit_history(history or [])
+            
+            ask_llm = self.llm.stream_response if stream else self.llm.get_response
+            response, source = self.fallback.run(lambda: ask_llm(query, context_str, priority, history_str), relaxed_answer, admit)
+            if source == "refused":
+                # Over budget, degrade as if the LLM were down instead of queueing behind other sessions
+                return reply("rate_limited", "message", text=self.rephrase_message(context))
+            source = "relaxed_kb" if source == "kb" else source
+            if isinstance(response, str):
+                return reply(source, "message", text=response)
+            return result(response, source)
@@ -1,10 +1,16 @@
+import os
+import time
+import uuid
 import streamlit as st
-from datetime import datetime, timedelta
-from typing import Dict, Optional
-from knowledge_base import KnowledgeBase
-from intent_detector import IntentDetector
-from entity_extractor import EntityExtractor
+from datetime import datetime
 from llm_fallback import LLMFallback
+from llm_backends import get_available_backends
+from llm_dispatcher import LLMDispatcher
+from token_budget import TokenBudget
+from kb_first_fallback import KBFirstFallback
+from rate_limiter import RateLimiter
+from analytics import AnalyticsLog, DEFAULT_LOG_PATH
+from tenants import TenantRegistry, DEFAULT_TENANT
 
 st.set_page_config(
     page_title="College Helpdesk Chatbot",
@@ -13,22 +19,75 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+TOKEN_BUDGET = TokenBudget()
+HISTORY_BLOCK_SIZE = 20
+
+
+@st.cache_resource
+def get_llm_dispatcher(provider, model):
+    return LLMDispatcher(LLMFallback(provider=provider, model=model, budget=TOKEN_BUDGET))
+
+
+@st.cache_resource
+def get_kb_first_fallback():
+    return KBFirstFallback()
+
+
+@st.cache_resource
+def get_rate_limiter():
+    return RateLimiter(
+        session_per_minute=float(os.getenv("LLM_SESSION_PER_MINUTE", "6")),
+        session_burst=int(os.getenv("LLM_SESSION_BURST", "3")),
+        global_per_minute=float(os.getenv("LLM_GLOBAL_PER_MINUTE", "60")),
+        global_burst=int(os.getenv("LLM_GLOBAL_BURST", "10"))
+    )
+
+
+@st.cache_resource
+def get_analytics_log():
+    path = os.getenv("ANALYTICS_LOG", DEFAULT_LOG_PATH)
+    return AnalyticsLog(path) if path else None
+
+
+@st.cache_resource
+def get_tenant_registry():
+    return TenantRegistry(
+        root=os.getenv("TENANTS_DIR", "tenants"),
+        max_tenants=int(os.getenv("MAX_LOADED_TENANTS", "8")),
+        snapshot_path=os.getenv("KB_SNAPSHOT"),
+        max_memory_bytes=int(os.environ["MAX_TENANT_MEMORY_MB"]) * 1024 * 1024 if os.getenv("MAX_TENANT_MEMORY_MB") else None
+    )
+
+
+def get_tenant_id():
+    return st.query_params.get("tenant", DEFAULT_TENANT)
+
 
-if "kb" not in st.session_state:
-    st.session_state.kb = KnowledgeBase()
+def get_llm():
+    return get_llm_dispatcher(st.session_state.get("llm_provider", "ollama"), st.session_state.get("llm_model", "llama2"))
 
-if "intent_detector" not in st.session_state:
-    st.session_state.intent_detector = IntentDetector()
 
-if "entity_extractor" not in st.session_state:
-    st.session_state.entity_extractor = EntityExtractor()
+tenant_registry = get_tenant_registry()
+try:
+    tenant = tenant_registry.get(get_tenant_id())
+except (KeyError, ValueError) as e:
+    st.error(f"Unknown college: {e}")
+    st.stop()
 
-if "llm" not in st.session_state:
-    provider = st.session_state.get("llm_provider", "ollama")
-    model = st.session_state.get("llm_model", "llama2")
-    st.session_state.llm = LLMFallback(provider=provider, model=model)
+if st.session_state.get("tenant_id") != tenant.tenant_id:
+    st.session_state.tenant_id = tenant.tenant_id
+    st.session_state.messages = []
+    st.session_state.history_blocks = []
+    st.session_state.pop("context", None)
+
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+if "messages" not in st.session_state:
+    st.session_state.messages = []
+
+if "history_blocks" not in st.session_state:
+    st.session_state.history_blocks = []
 
 if "context" not in st.session_state:
     st.session_state.context = {
@@ -38,180 +97,56 @@ if "context" not in st.session_state:
     }
 
 
-def format_timetable(data, day=None):
-    if day:
-        classes = data.get(day, [])
-        if classes:
-            return f"Classes on {day}:\n" + "\n".join([f"  {cls}" for cls in classes])
-        else:
-            return f"No classes scheduled for {day}."
-    else:
-        response = "Weekly Timetable:\n\n"
-        for day_name, classes in data.items():
-            if classes:
-                response += f"{day_name}:\n"
-                response += "\n".join([f"  {cls}" for cls in classes]) + "\n\n"
-        return response
-
-
-def format_exam(data):
-    response = "Exam Schedule:\n\n"
-    response += f"Start Date: {data.get('start_date', 'N/A')}\n"
-    response += f"End Date: {data.get('end_date', 'N/A')}\n"
-    response += f"Subjects:\n"
-    for subject in data.get('subjects', []):
-        response += f"  {subject}\n"
-    return response
+def get_engine():
+    return tenant.engine(get_llm(), get_kb_first_fallback(), TOKEN_BUDGET, response_format="markdown", rate_limiter=get_rate_limiter())
+
+
+def record_turn(query, answer, started):
+    analytics = get_analytics_log()
+    if analytics:
+        analytics.record(tenant.tenant_id, st.session_state.session_id, query, answer, time.perf_counter() - started)
 
 
 def get_answer(query, context):
-    intent, confidence = st.session_state.intent_detector.detect_intent(query)
-    entities = st.session_state.entity_extractor.extract_all(query)
-    
-    dept = entities.get("department") or context.get("department")
-    sem = entities.get("semester") or context.get("semester")
-    day = entities.get("day")
-    date = entities.get("date")
-    exam_type = entities.get("exam_type") or context.get("exam_type")
-    
-    if dept:
-        context["department"] = dept
-    if sem:
-        context["semester"] = sem
-    if intent:
-        context["last_intent"] = intent
-    
-    if not intent or confidence < 0.3:
-        if context.get("last_intent"):
-            if dept or sem or day:
-                intent = context.get("last_intent")
-                confidence = 0.5
-    
-    if intent == "timetable" and confidence > 0.3:
-        if not dept:
-            if context.get("department"):
-                dept = context["department"]
-            else:
-                return "I need to know which department you're asking about. Please specify (e.g., CSE, ECE)."
-        
-        if not sem:
-            if context.get("semester"):
-                sem = context["semester"]
-            else:
-                return "I need to know which semester. Please specify (e.g., Semester 3)."
-        
-        timetable_data = st.session_state.kb.get_timetable(dept, sem, day)
-        
-        if timetable_data:
-            if day:
-                classes = timetable_data if isinstance(timetable_data, list) else None
-                if classes:
-                    return format_timetable({day: classes}, day)
-                else:
-                    return f"No classes scheduled for {day} for {dept} {sem}."
-            else:
-                return format_timetable(timetable_data)
-        else:
-            return f"Sorry, I couldn't find timetable information for {dept} {sem}. Please check if the department and semester are correct."
-    
-    elif intent == "exam" and confidence > 0.3:
-        if not exam_type:
-            exam_type = "mid_semester"
-        
-        if not dept:
-            if context.get("department"):
-                dept = context["department"]
-            else:
-                return "I need to know which department. Please specify (e.g., CSE, ECE)."
-        
-        if not sem:
-            if context.get("semester"):
-                sem = context["semester"]
-            else:
-                return "I need to know which semester. Please specify (e.g., Semester 3)."
-        
-        exam_data = st.session_state.kb.get_exam_schedule(exam_type, dept, sem)
-        
-        if exam_data:
-            exam_name = exam_type.replace("_", " ").title()
-            return f"{exam_name} Exam Schedule for {dept} {sem}:\n\n" + format_exam(exam_data)
-        else:
-            return f"Sorry, I couldn't find {exam_type} exam schedule for {dept} {sem}."
-    
-    elif intent == "holiday" and confidence > 0.3:
-        if date:
-            holiday_name = st.session_state.kb.check_holiday(date)
-            if holiday_name:
-                return f"Yes, {date} is a holiday: {holiday_name}"
-            else:
-                return f"No, {date} is not a holiday."
-        else:
-            tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
-            holiday_name = st.session_state.kb.check_holiday(tomorrow)
-            if holiday_name:
-                return f"Yes, tomorrow ({tomorrow}) is a holiday: {holiday_name}"
-            else:
-                return f"No, tomorrow ({tomorrow}) is not a holiday."
-    
-    elif intent == "credits" and confidence > 0.3:
-        credit_info = st.session_state.kb.get_credit_requirements()
-        response = "Credit Requirements:\n\n"
-        response += f"Minimum credits to pass: {credit_info.get('minimum_credits_to_pass', 'N/A')}\n"
-        response += f"Credits per semester: {credit_info.get('credits_per_semester', 'N/A')}\n"
-        response += f"Total credits for degree: {credit_info.get('total_credits_for_degree', 'N/A')}\n"
-        response += f"Minimum attendance required: {credit_info.get('minimum_attendance_percentage', 'N/A')}%\n"
-        response += f"Backlogs allowed: {credit_info.get('backlog_allowed', 'N/A')}\n"
-        return response
+    started = time.perf_counter()
+    answer = get_engine().answer(query, context, st.session_state.messages[:-1], session_id=st.session_state.session_id)
+    record_turn(query, answer, started)
+    return answer["response"]
+
+
+def stream_text(text):
+    for line in text.splitlines(keepends=True):
+        yield line
+
+
+def get_answer_stream(query, context):
+    answer = get_engine().answer(query, context, st.session_state.messages[:-1], stream=True, session_id=st.session_state.session_id)
+    response = answer["response"]
+    if isinstance(response, str):
+        return answer, stream_text(response)
+    return answer, response
+
+
+def render_history(messages):
+    blocks = st.session_state.history_blocks
+    if len(blocks) * HISTORY_BLOCK_SIZE > len(messages):
+        blocks.clear()
     
-    elif intent == "attendance" and confidence > 0.3:
-        attendance_info = st.session_state.kb.get_attendance_rules()
-        response = "Attendance Rules:\n\n"
-        response += f"Minimum attendance required: {attendance_info.get('minimum_percentage', 'N/A')}%\n"
-        response += f"Below {attendance_info.get('minimum_percentage', 75)}%: {attendance_info.get('consequences_below_75', 'N/A')}\n"
-        response += f"Medical leave allowed: {attendance_info.get('medical_leave_allowed', 'N/A')}\n"
-        response += f"Leave application process: {attendance_info.get('leave_application_process', 'N/A')}\n"
-        return response
+    finished = len(messages) - len(messages) % HISTORY_BLOCK_SIZE
+    while len(blocks) * HISTORY_BLOCK_SIZE < finished:
+        start = len(blocks) * HISTORY_BLOCK_SIZE
+        blocks.append("\n\n".join([
+            f"**{'You' if m['role'] == 'user' else 'Bot'}:** {m['content']}"
+            for m in messages[start:start + HISTORY_BLOCK_SIZE]
+        ]))
     
-    elif intent == "contact" and confidence > 0.3:
-        if not dept:
-            dept = entities.get("department") or context.get("department")
-            if not dept:
-                return "I need to know which department. Please specify (e.g., CSE, ECE)."
-        
-        contact_info = st.session_state.kb.get_department_contact(dept)
-        
-        if contact_info:
-            response = f"{dept} Department Contacts:\n\n"
-            response += f"HOD: {contact_info.get('HOD', 'N/A')}\n"
-            response += f"Email: {contact_info.get('email', 'N/A')}\n"
-            response += f"Phone: {contact_info.get('phone', 'N/A')}\n"
-            response += f"Office Location: {contact_info.get('office_location', 'N/A')}\n"
-            return response
-        else:
-            return f"Sorry, I couldn't find contact information for {dept} department."
+    for i, block in enumerate(blocks):
+        with st.expander(f"Messages {i * HISTORY_BLOCK_SIZE + 1}-{(i + 1) * HISTORY_BLOCK_SIZE}"):
+            st.markdown(block)
     
-    else:
-        if context.get("last_intent") == "timetable" and (dept or context.get("department")):
-            return "I have the department. Please also specify the semester (e.g., Semester 3)."
-        
-        if not st.session_state.llm.is_available():
-            suggestions = []
-            if context.get("last_intent"):
-                suggestions.append(f"You were asking about {context.get('last_intent')}.")
-            if context.get("department"):
-                suggestions.append(f"Department: {context.get('department')}")
-            if context.get("semester"):
-                suggestions.append(f"Semester: {context.get('semester')}")
-            
-            msg = "I'm having trouble understanding your query."
-            if suggestions:
-                msg += " " + " ".join(suggestions)
-            msg += " Please try rephrasing your question or use one of the FAQ buttons in the sidebar."
-            
-            return msg
-        
-        context_str = f"Department: {context.get('department')}, Semester: {context.get('semester')}"
-        return st.session_state.llm.get_response(query, context_str)
+    for message in messages[finished:]:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
 
 
 def main():
@@ -221,22 +156,23 @@ def main():
     with st.sidebar:
         st.header("Settings")
         
+        providers = get_available_backends()
         llm_provider = st.selectbox(
             "LLM Provider",
-            ["ollama", "openai"],
-            index=0 if st.session_state.get("llm_provider", "ollama") == "ollama" else 1
+            providers,
+            index=providers.index(st.session_state.get("llm_provider", "ollama"))
         )
         
+        default_models = {"ollama": "llama2", "openai": "gpt-3.5-turbo", "stub": "echo"}
         llm_model = st.text_input(
             "LLM Model",
-            value=st.session_state.get("llm_model", "llama2" if llm_provider == "ollama" else "gpt-3.5-turbo"),
-            help="Model name (e.g., llama2, mistral for Ollama or gpt-3.5-turbo for OpenAI)"
+            value=st.session_state.get("llm_model", default_models.get(llm_provider, "")),
+            help="Model name (e.g., llama2, mistral for Ollama, gpt-3.5-turbo for OpenAI, or echo for the offline stub)"
         )
         
         if st.button("Update LLM Settings"):
             st.session_state.llm_provider = llm_provider
             st.session_state.llm_model = llm_model
-            st.session_state.llm = LLMFallback(provider=llm_provider, model=llm_model)
             st.success("Settings updated!")
         
         st.divider()
@@ -314,18 +250,30 @@ def main():
         
         if st.button("Clear Chat History", use_container_width=True):
             st.session_state.messages = []
+            st.session_state.history_blocks = []
             st.session_state.context = {"department": None, "semester": None, "last_intent": None}
             st.rerun()
         
         st.divider()
+        
+        with st.expander("Performance Stats"):
+            st.json({
+                "query_normalizer": tenant.normalizer.get_stats(),
+                "nlu_cache": tenant.nlu_cache.get_stats(),
+                "calendar": tenant.calendar.get_stats(),
+                "tenants": tenant_registry.get_stats(),
+                "kb_first_fallback": get_kb_first_fallback().get_stats(),
+                "llm_dispatcher": get_llm().get_stats(),
+                "rate_limiter": get_rate_limiter().get_stats(),
+                "analytics": get_analytics_log().get_stats() if get_analytics_log() else None
+            })
+        
         st.markdown("**Admin Panel:** Run `streamlit run admin.py`")
     
     chat_container = st.container()
     
     with chat_container:
-        for message in st.session_state.messages:
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"])
+        render_history(st.session_state.messages)
         
         if prompt := st.chat_input("Ask me anything about the college..."):
             st.session_state.messages.append({"role": "user", "content": prompt})
@@ -334,10 +282,11 @@ def main():
                 st.markdown(prompt)
             
             with st.chat_message("assistant"):
-                with st.spinner("Thinking..."):
-                    response = get_answer(prompt, st.session_state.context)
-                    st.markdown(response)
-                    st.session_state.messages.append({"role": "assistant", "content": response})
+                started = time.perf_counter()
+                answer, stream = get_answer_stream(prompt, st.session_state.context)
+                response = st.write_stream(stream)
+                st.session_state.messages.append({"role": "assistant", "content": response})
+                record_turn(prompt, answer, started)
 
 
 if __name__ == "__main__":
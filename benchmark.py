@@ -0,0 +1,391 @@
+import argparse
+import gc
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+def measure_allocations(build):
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    objects = build()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return objects, current - start
+
+
+def new_session_context():
+    return {"department": None, "semester": None, "last_intent": None}
+
+
+def bench_session_memory(sessions=200):
+    from knowledge_base import KnowledgeBase
+    from intent_detector import IntentDetector
+    from entity_extractor import EntityExtractor
+    from kb_retriever import KBRetriever
+    
+    def per_session_objects():
+        result = []
+        for _ in range(sessions):
+            kb = KnowledgeBase()
+            result.append({
+                "kb": kb,
+                "retriever": KBRetriever(kb),
+                "intent_detector": IntentDetector(),
+                "entity_extractor": EntityExtractor(),
+                "context": new_session_context(),
+                "messages": []
+            })
+        return result
+    
+    def shared_objects():
+        kb = KnowledgeBase()
+        shared = {
+            "kb": kb,
+            "retriever": KBRetriever(kb),
+            "intent_detector": IntentDetector(),
+            "entity_extractor": EntityExtractor()
+        }
+        return shared, [{"context": new_session_context(), "messages": []} for _ in range(sessions)]
+    
+    _, per_session_bytes = measure_allocations(per_session_objects)
+    _, shared_bytes = measure_allocations(shared_objects)
+    
+    print(f"Session memory ({sessions} sessions)")
+    print(f"  per-session copies: {per_session_bytes / 1024:.1f} KiB total, {per_session_bytes / sessions / 1024:.2f} KiB/session")
+    print(f"  shared resources:   {shared_bytes / 1024:.1f} KiB total, {shared_bytes / sessions / 1024:.2f} KiB/session")
+    print(f"  reduction: {per_session_bytes / max(shared_bytes, 1):.1f}x")
+    return {"per_session_bytes": per_session_bytes, "shared_bytes": shared_bytes}
+
+
+def time_per_call(fn, args_list, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for args in args_list:
+            fn(*args)
+    return (time.perf_counter() - start) / (repeat * len(args_list))
+
+
+SAMPLE_QUERIES = [
+    "What is tomorrow's timetable for CSE sem 3?",
+    "When are mid-semester exams for CSE semester 3?",
+    "Is tomorrow a holiday?",
+    "How many credits are needed to pass?",
+    "What is the minimum attendance required?",
+    "Who is HOD of CSE?",
+    "What about Tuesday?",
+    "And for semester 4?",
+    "Show my timtable for ECE sem 1",
+    "when is the exm",
+    "Is 15/08/2025 a holliday?",
+    "minimum attendence for exams"
+]
+
+
+def bench_query_normalizer(repeat=200):
+    from intent_detector import IntentDetector
+    from entity_extractor import EntityExtractor
+    from query_normalizer import QueryNormalizer
+    
+    detector = IntentDetector()
+    extractor = EntityExtractor()
+    start = time.perf_counter()
+    normalizer = QueryNormalizer.from_nlu(detector, extractor)
+    build_time = time.perf_counter() - start
+    
+    queries = [(q,) for q in SAMPLE_QUERIES]
+    cold = time_per_call(normalizer._normalize, queries, repeat=5)
+    warm = time_per_call(normalizer.normalize, queries, repeat=repeat)
+    
+    print(f"Query normalizer ({len(normalizer.targets)} vocabulary words, {len(normalizer.deletes)} delete keys)")
+    print(f"  index build: {build_time * 1000:.1f} ms")
+    print(f"  uncached:    {cold * 1e6:.1f} us/query")
+    print(f"  memoized:    {warm * 1e6:.2f} us/query (hit rate {normalizer.get_stats()['hit_rate']:.1%})")
+    return {"uncached": cold, "memoized": warm}
+
+
+def bench_nlu_cache(repeat=200):
+    from intent_detector import IntentDetector
+    from entity_extractor import EntityExtractor
+    from nlu_cache import NLUCache
+    
+    detector = IntentDetector()
+    extractor = EntityExtractor()
+    cache = NLUCache(detector, extractor)
+    queries = [(q.lower(),) for q in SAMPLE_QUERIES]
+    
+    uncached = time_per_call(lambda q: (detector.detect_intent(q), extractor.extract_all(q)), queries, repeat=20)
+    cached = time_per_call(cache.analyze, queries, repeat=repeat)
+    
+    print(f"NLU front end ({len(queries)} sample/FAQ queries)")
+    print(f"  detect_intent + extract_all: {uncached * 1e6:.1f} us/query")
+    print(f"  NLUCache.analyze:            {cached * 1e6:.2f} us/query (hit rate {cache.get_stats()['hit_rate']:.1%})")
+    return {"uncached": uncached, "cached": cached}
+
+
+DATE_QUERIES = [
+    "Is 15/08/2025 a holiday?",
+    "holiday on 2025-03-14",
+    "Is tomorrow a holiday?",
+    "what is the timetable for cse sem 3",
+    "Is 15 Aug a holiday?",
+    "classes next friday"
+]
+
+
+def _strptime_extract_date(query):
+    import re
+    from datetime import datetime, timedelta
+    
+    query_lower = query.lower()
+    today = datetime.now()
+    if re.search(r'\btomorrow\b', query_lower):
+        return (today + timedelta(days=1)).strftime("%Y-%m-%d")
+    elif re.search(r'\btoday\b', query_lower):
+        return today.strftime("%Y-%m-%d")
+    
+    for pattern in [r'\b(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})\b', r'\b(\d{4}[-/]\d{1,2}[-/]\d{1,2})\b']:
+        match = re.search(pattern, query_lower)
+        if match:
+            for fmt in ["%d-%m-%Y", "%d/%m/%Y", "%Y-%m-%d", "%Y/%m/%d", "%d-%m-%y", "%d/%m/%y"]:
+                try:
+                    return datetime.strptime(match.group(1), fmt).strftime("%Y-%m-%d")
+                except ValueError:
+                    continue
+    return None
+
+
+def bench_date_parser(repeat=2000):
+    from knowledge_base import KnowledgeBase
+    from date_parser import parse_date
+    
+    kb = KnowledgeBase()
+    queries = [(q,) for q in DATE_QUERIES]
+    
+    # Previous path: strptime format loop, then check_holiday parses the string again
+    legacy = time_per_call(lambda q: kb.check_holiday(_strptime_extract_date(q) or ""), queries, repeat=repeat)
+    
+    def parse_and_check(query):
+        day = parse_date(query)
+        return kb.check_holiday(day) if day else None
+    
+    parsed = time_per_call(parse_and_check, queries, repeat=repeat)
+    parse_only = time_per_call(parse_date, queries, repeat=repeat)
+    
+    print(f"Date parsing ({len(queries)} queries, extract + holiday lookup)")
+    print(f"  strptime loop + re-parse: {legacy * 1e6:.1f} us/query")
+    print(f"  date_parser + date key:   {parsed * 1e6:.1f} us/query")
+    print(f"  parse_date alone:         {parse_only * 1e6:.1f} us/query")
+    return {"legacy": legacy, "date_parser": parsed, "parse_only": parse_only}
+
+
+def bench_response_templates(repeat=5000):
+    from knowledge_base import KnowledgeBase
+    from response_templates import render
+    
+    kb = KnowledgeBase()
+    week = kb.get_timetable("CSE", "Semester 3")
+    exam = kb.get_exam_schedule("mid_semester", "CSE", "Semester 3")
+    contact = kb.get_department_contact("CSE")
+    days = [{"day": day, "classes": classes} for day, classes in week.items() if classes]
+    
+    cases = {
+        "timetable_week": lambda fmt: render("timetable_week", {"days": days}, fmt),
+        "exam": lambda fmt: render("exam", {"exam_name": "Mid Semester", "department": "CSE", "semester": "Semester 3", **exam}, fmt),
+        "contact": lambda fmt: render("contact", {"department": "CSE", **contact}, fmt)
+    }
+    
+    # Rendering cost per answer format; the templates trade a little speed over inlined f-strings for reuse across formats
+    results = {}
+    print(f"Response template rendering (us/response, {repeat} renders)")
+    for name, templated in cases.items():
+        timings = {fmt: time_per_call(templated, [(fmt,)], repeat=repeat) for fmt in ("text", "markdown", "json")}
+        results[name] = timings
+        print(f"  {name:15s} " + "  ".join(f"{label}={value * 1e6:.2f}" for label, value in timings.items()))
+    return results
+
+
+def bench_calendar(repeat=2000):
+    from datetime import date
+    from knowledge_base import KnowledgeBase
+    from academic_calendar import CalendarMaterializer, parse_iso_date
+    
+    kb = KnowledgeBase()
+    dates = [date(2025, 3, day) for day in range(10, 17)]
+    
+    def join_on_the_fly(day):
+        parsed = parse_iso_date(day)
+        holiday = kb.check_holiday(day.isoformat())
+        exams = []
+        for exam_type in kb.exams:
+            exam = kb.get_exam_schedule(exam_type, "CSE", "Semester 3")
+            if exam and parse_iso_date(exam["start_date"]) <= parsed <= parse_iso_date(exam["end_date"]):
+                exams.append(exam_type)
+        classes = [] if holiday or exams else kb.get_timetable("CSE", "Semester 3", parsed.strftime("%A"))
+        return holiday, exams, classes
+    
+    calendar = CalendarMaterializer(kb)
+    start = time.perf_counter()
+    calendar.get_schedule("CSE", "Semester 3")
+    build_time = time.perf_counter() - start
+    
+    args = [(d,) for d in dates]
+    on_the_fly = time_per_call(join_on_the_fly, args, repeat=repeat // 10)
+    materialized = time_per_call(lambda d: calendar.get_day("CSE", "Semester 3", d), args, repeat=repeat)
+    
+    print(f"Calendar materialization ({calendar.get_stats()['days']} days for CSE Semester 3)")
+    print(f"  build:          {build_time * 1000:.1f} ms (once per dept/semester)")
+    print(f"  join per query: {on_the_fly * 1e6:.1f} us/date")
+    print(f"  materialized:   {materialized * 1e6:.1f} us/date")
+    return {"build": build_time, "on_the_fly": on_the_fly, "materialized": materialized}
+
+
+def _kb_worker(mode, data_dir, snapshot_path, lookups):
+    from knowledge_base import KnowledgeBase
+    from kb_snapshot import SnapshotKnowledgeBase
+    
+    tracemalloc.start()
+    start = time.perf_counter()
+    if mode == "snapshot":
+        kb = SnapshotKnowledgeBase(snapshot_path)
+    else:
+        kb = KnowledgeBase(data_dir)
+    load_time = time.perf_counter() - start
+    heap_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    
+    departments = kb.get_all_departments()
+    start = time.perf_counter()
+    for i in range(lookups):
+        dept = departments[i % len(departments)]
+        kb.get_timetable(dept, "Semester 3", "Monday")
+        kb.get_exam_schedule("mid_semester", dept, "Semester 3")
+        kb.check_holiday("2025-03-14")
+        kb.get_department_contact(dept)
+    return {"load_time": load_time, "heap_bytes": heap_bytes, "lookup_time": time.perf_counter() - start}
+
+
+def bench_kb_workers(workers=None, lookups=20000):
+    from kb_snapshot import build_snapshot
+    
+    workers = workers or min(4, os.cpu_count() or 1)
+    snapshot_path = os.path.join(tempfile.mkdtemp(prefix="kb-bench-"), "kb.snapshot")
+    build_snapshot("data", snapshot_path)
+    results = {}
+    
+    print(f"Knowledge base across worker processes ({lookups} lookups/worker, snapshot {os.path.getsize(snapshot_path)} bytes)")
+    for mode in ("json", "snapshot"):
+        for count in sorted({1, workers}):
+            with multiprocessing.Pool(count) as pool:
+                start = time.perf_counter()
+                stats = pool.starmap(_kb_worker, [(mode, "data", snapshot_path, lookups)] * count)
+                elapsed = time.perf_counter() - start
+            heap = sum(s["heap_bytes"] for s in stats) / count
+            load = sum(s["load_time"] for s in stats) / count
+            throughput = count * lookups / elapsed
+            results[(mode, count)] = {"heap_bytes": heap, "load_time": load, "throughput": throughput}
+            print(f"  {mode:8s} x{count}: {heap / 1024:6.1f} KiB heap/worker, load {load * 1000:.2f} ms, {throughput:,.0f} lookups/s")
+    
+    for mode in ("json", "snapshot"):
+        scaling = results[(mode, workers)]["throughput"] / results[(mode, 1)]["throughput"]
+        print(f"  {mode} scaling 1 -> {workers} workers: {scaling:.2f}x")
+    os.remove(snapshot_path)
+    os.rmdir(os.path.dirname(snapshot_path))
+    return results
+
+
+IMPORT_TARGETS = ["knowledge_base", "answer_engine", "tenants", "analytics"]
+HEAVY_MODULES = ["streamlit", "requests", "openai", "dotenv", "concurrent.futures"]
+
+
+def _python(code, *flags):
+    env = dict(os.environ)
+    # Measure what a deployed worker sees: bytecode is cached after the first run
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+
+
+def _import_profile(code):
+    timings = {}
+    for line in _python(code, "-X", "importtime").stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if self_us.strip().isdigit():
+            timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def bench_import_time(repeat=5):
+    startup = set(_import_profile("pass"))
+    results = {}
+    
+    print(f"Import time (python -X importtime, best of {repeat}, warm bytecode cache)")
+    for module in IMPORT_TARGETS:
+        _python(f"import {module}")
+        profiles = [_import_profile(f"import {module}") for _ in range(repeat)]
+        best = min(profiles, key=lambda p: p.get(module, (0, float("inf")))[1])
+        heaviest = sorted(
+            ((name, self_us) for name, (self_us, _) in best.items() if name not in startup),
+            key=lambda item: item[1], reverse=True
+        )[:3]
+        loaded = _python(f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))").stdout.strip()
+        results[module] = best.get(module, (0, 0))[1] / 1000
+        print(f"  {module:15s} {results[module]:6.1f} ms  heaviest: {', '.join(f'{n} {t / 1000:.1f}' for n, t in heaviest)}  heavy deps loaded: {loaded or 'none'}")
+    
+    create = "from answer_engine import AnswerEngine; AnswerEngine.create(provider='stub', model='echo')"
+    _python(create)
+    timings = []
+    for code in ("pass", create):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            _python(code)
+            best = min(best, time.perf_counter() - start)
+        timings.append(best)
+    results["engine_cold_start"] = timings[1] - timings[0]
+    print(f"  engine cold start (import + AnswerEngine.create, stub LLM): {results['engine_cold_start'] * 1000:.1f} ms over a {timings[0] * 1000:.1f} ms bare interpreter")
+    return results
+
+
+BENCHMARKS = {
+    "session_memory": bench_session_memory,
+    "query_normalizer": bench_query_normalizer,
+    "nlu_cache": bench_nlu_cache,
+    "kb_workers": bench_kb_workers,
+    "calendar": bench_calendar,
+    "date_parser": bench_date_parser,
+    "response_templates": bench_response_templates,
+    "import_time": bench_import_time,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="College Helpdesk Chatbot benchmarks")
+    parser.add_argument("names", nargs="*", help=f"Benchmarks to run (default: all). Available: {', '.join(BENCHMARKS)}")
+    args = parser.parse_args(argv)
+    
+    names = args.names or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"[ERROR] Unknown benchmark: {name}")
+            return 1
+    
+    for name in names:
+        start = time.perf_counter()
+        BENCHMARKS[name]()
+        print(f"  ({name} took {time.perf_counter() - start:.2f}s)")
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+import pytest
+
+
+# The checks in test_setup.py report failures by returning False so they also work as a plain script
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    funcargs = {arg: pyfuncitem.funcargs[arg] for arg in pyfuncitem._fixtureinfo.argnames}
+    if pyfuncitem.obj(**funcargs) is False:
+        pytest.fail(f"{pyfuncitem.name} returned False; see the [ERROR] lines in its output", pytrace=False)
+    return True
@@ -0,0 +1,89 @@
+import re
+from datetime import date, timedelta
+
+
+MONTHS = {
+    "jan": 1, "january": 1, "feb": 2, "february": 2, "mar": 3, "march": 3,
+    "apr": 4, "april": 4, "may": 5, "jun": 6, "june": 6, "jul": 7, "july": 7,
+    "aug": 8, "august": 8, "sep": 9, "sept": 9, "september": 9, "oct": 10, "october": 10,
+    "nov": 11, "november": 11, "dec": 12, "december": 12
+}
+
+WEEKDAYS = {
+    "monday": 0, "mon": 0, "tuesday": 1, "tue": 1, "tues": 1, "wednesday": 2, "wed": 2,
+    "thursday": 3, "thu": 3, "thurs": 3, "friday": 4, "fri": 4, "saturday": 5, "sat": 5,
+    "sunday": 6, "sun": 6
+}
+
+RELATIVE_DAYS = {"yesterday": -1, "today": 0, "tomorrow": 1}
+
+
+def _alternation(words):
+    return "|".join(sorted(words, key=len, reverse=True))
+
+
+MONTH = _alternation(MONTHS)
+WEEKDAY = _alternation(WEEKDAYS)
+
+DATE_RE = re.compile(rf"""
+    \b(?:
+        (?P<iso_y>\d{{4}})[-/](?P<iso_m>\d{{1,2}})[-/](?P<iso_d>\d{{1,2}})
+      | (?P<dmy_d>\d{{1,2}})[-/](?P<dmy_m>\d{{1,2}})[-/](?P<dmy_y>\d{{4}}|\d{{2}})
+      | (?P<dm_d>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<dm_m>{MONTH})\.?(?:,?\s+(?P<dm_y>\d{{4}}))?
+      | (?P<md_m>{MONTH})\.?\s+(?P<md_d>\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(?P<md_y>\d{{4}}))?
+      | (?P<rel>yesterday|today|tomorrow)
+      | (?P<mod>this|next|coming)\s+(?P<target>weekend|{WEEKDAY})
+    )\b
+""", re.IGNORECASE | re.VERBOSE)
+
+# Queries whose date depends on the day they are asked (used to expire cached NLU results)
+RELATIVE_DATE_RE = re.compile(
+    rf"\b(?:yesterday|today|tomorrow|(?:this|next|coming)\s+(?:weekend|{WEEKDAY})|\d{{1,2}}(?:st|nd|rd|th)?\s+(?:of\s+)?(?:{MONTH})|(?:{MONTH})\.?\s+\d{{1,2}})\b",
+    re.IGNORECASE
+)
+
+
+def _relative_weekday(modifier, weekday, today):
+    if modifier == "coming":
+        return today + timedelta(days=(weekday - today.weekday()) % 7)
+    monday = today - timedelta(days=today.weekday())
+    if modifier == "next":
+        monday += timedelta(days=7)
+    return monday + timedelta(days=weekday)
+
+
+def _resolve(match, today):
+    if match["iso_y"]:
+        return date(int(match["iso_y"]), int(match["iso_m"]), int(match["iso_d"]))
+    
+    if match["dmy_y"]:
+        year = int(match["dmy_y"])
+        if year < 100:
+            year += 2000
+        return date(year, int(match["dmy_m"]), int(match["dmy_d"]))
+    
+    if match["dm_m"]:
+        year = int(match["dm_y"]) if match["dm_y"] else today.year
+        return date(year, MONTHS[match["dm_m"].lower()], int(match["dm_d"]))
+    
+    if match["md_m"]:
+        year = int(match["md_y"]) if match["md_y"] else today.year
+        return date(year, MONTHS[match["md_m"].lower()], int(match["md_d"]))
+    
+    if match["rel"]:
+        return today + timedelta(days=RELATIVE_DAYS[match["rel"].lower()])
+    
+    target = match["target"].lower()
+    weekday = 5 if target == "weekend" else WEEKDAYS[target]
+    return _relative_weekday(match["mod"].lower(), weekday, today)
+
+
+def parse_date(text, today=None):
+    today = today or date.today()
+    for match in DATE_RE.finditer(text):
+        try:
+            return _resolve(match, today)
+        except ValueError:
+            # Out-of-range day or month (e.g. 31/02/2025); try the next candidate
+            continue
+    return None
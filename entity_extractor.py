@@ -1,18 +1,43 @@
 import re
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+from datetime import date, timedelta
+from date_parser import parse_date
+
+
+DEFAULT_DEPARTMENT_MAP = {
+    'cse': 'CSE',
+    'computer science': 'CSE',
+    'computer science engineering': 'CSE',
+    'ece': 'ECE',
+    'electronics': 'ECE',
+    'electronics and communication': 'ECE',
+    'me': 'ME',
+    'mechanical': 'ME',
+    'mechanical engineering': 'ME',
+    'ee': 'EE',
+    'electrical': 'EE',
+    'electrical engineering': 'EE',
+    'ce': 'CE',
+    'civil': 'CE',
+    'civil engineering': 'CE',
+    'bt': 'BT',
+    'biotech': 'BT',
+    'biotechnology': 'BT'
+}
+
+
+def build_department_patterns(department_map):
+    aliases = {}
+    for alias, code in department_map.items():
+        aliases.setdefault(code, []).append(re.escape(alias.lower()))
+    return [(rf"\b({'|'.join(names)})\b", code) for code, names in aliases.items()]
 
 
 class EntityExtractor:
-    def __init__(self):
-        self.department_patterns = [
-            r'\b(cse|computer science|computer science engineering)\b',
-            r'\b(ece|electronics|electronics and communication)\b',
-            r'\b(me|mechanical|mechanical engineering)\b',
-            r'\b(ee|electrical|electrical engineering)\b',
-            r'\b(ce|civil|civil engineering)\b',
-            r'\b(bt|biotech|biotechnology)\b'
-        ]
+    def __init__(self, department_map=None):
+        self.department_map = dict(department_map or DEFAULT_DEPARTMENT_MAP)
+        department_patterns = build_department_patterns(self.department_map)
+        self.department_patterns = [pattern for pattern, _ in department_patterns]
+        self.department_codes = [code for _, code in department_patterns]
         
         self.semester_patterns = [
             r'\b(sem\s*[1-8]|semester\s*[1-8]|1st\s*sem|first\s*sem|2nd\s*sem|second\s*sem|3rd\s*sem|third\s*sem|4th\s*sem|fourth\s*sem)\b',
@@ -26,10 +51,9 @@ class EntityExtractor:
             r'\b(sunday|sun)\b'
         ]
         
-        self.date_patterns = [
-            r'\b(tomorrow|today)\b',
-            r'\b(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})\b',
-            r'\b(\d{4}[-/]\d{1,2}[-/]\d{1,2})\b',
+        self.week_patterns = [
+            r'\b(this|current)\s+week\b',
+            r'\b(next|coming)\s+week\b'
         ]
         
         self.exam_type_patterns = [
@@ -40,34 +64,9 @@ class EntityExtractor:
     def extract_department(self, query):
         query_lower = query.lower()
         
-        department_map = {
-            'cse': 'CSE',
-            'computer science': 'CSE',
-            'computer science engineering': 'CSE',
-            'ece': 'ECE',
-            'electronics': 'ECE',
-            'electronics and communication': 'ECE',
-            'me': 'ME',
-            'mechanical': 'ME',
-            'mechanical engineering': 'ME',
-            'ee': 'EE',
-            'electrical': 'EE',
-            'electrical engineering': 'EE',
-            'ce': 'CE',
-            'civil': 'CE',
-            'civil engineering': 'CE',
-            'bt': 'BT',
-            'biotech': 'BT',
-            'biotechnology': 'BT'
-        }
-        
-        for pattern in self.department_patterns:
-            match = re.search(pattern, query_lower, re.IGNORECASE)
-            if match:
-                matched_text = match.group(0).lower()
-                for key, value in department_map.items():
-                    if key in matched_text:
-                        return value
+        for pattern, code in zip(self.department_patterns, self.department_codes):
+            if re.search(pattern, query_lower, re.IGNORECASE):
+                return code
         
         return None
     
@@ -84,7 +83,7 @@ class EntityExtractor:
         
         return None
     
-    def extract_day(self, query):
+    def extract_day(self, query, today=None):
         query_lower = query.lower()
         
         day_map = {
@@ -101,39 +100,25 @@ class EntityExtractor:
             if re.search(rf'\b{day_key}\b', query_lower, re.IGNORECASE):
                 return day_value
         
+        today = today or date.today()
         if re.search(r'\btomorrow\b', query_lower):
-            tomorrow = datetime.now() + timedelta(days=1)
-            return tomorrow.strftime("%A")
+            return (today + timedelta(days=1)).strftime("%A")
         
         if re.search(r'\btoday\b', query_lower):
-            today = datetime.now()
             return today.strftime("%A")
         
         return None
     
-    def extract_date(self, query):
+    def extract_date(self, query, today=None):
+        return parse_date(query, today)
+    
+    def extract_week(self, query):
         query_lower = query.lower()
-        today = datetime.now()
         
-        if re.search(r'\btomorrow\b', query_lower):
-            tomorrow = today + timedelta(days=1)
-            return tomorrow.strftime("%Y-%m-%d")
-        elif re.search(r'\btoday\b', query_lower):
-            return today.strftime("%Y-%m-%d")
-        
-        for pattern in self.date_patterns[1:]:
-            match = re.search(pattern, query_lower)
-            if match:
-                date_str = match.group(1)
-                try:
-                    for fmt in ["%d-%m-%Y", "%d/%m/%Y", "%Y-%m-%d", "%Y/%m/%d", "%d-%m-%y", "%d/%m/%y"]:
-                        try:
-                            date_obj = datetime.strptime(date_str, fmt)
-                            return date_obj.strftime("%Y-%m-%d")
-                        except ValueError:
-                            continue
-                except:
-                    pass
+        if re.search(self.week_patterns[0], query_lower):
+            return "this_week"
+        elif re.search(self.week_patterns[1], query_lower):
+            return "next_week"
         
         return None
     
@@ -147,11 +132,12 @@ class EntityExtractor:
         
         return None
     
-    def extract_all(self, query):
+    def extract_all(self, query, today=None):
         return {
             "department": self.extract_department(query),
             "semester": self.extract_semester(query),
-            "day": self.extract_day(query),
-            "date": self.extract_date(query),
-            "exam_type": self.extract_exam_type(query)
+            "day": self.extract_day(query, today),
+            "date": self.extract_date(query, today),
+            "exam_type": self.extract_exam_type(query),
+            "week": self.extract_week(query)
         }
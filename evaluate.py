@@ -0,0 +1,263 @@
+import argparse
+import json
+import sys
+import time
+from datetime import date
+from answer_engine import AnswerEngine
+from load_generator import percentile
+
+
+DEFAULT_CORPUS = "eval_corpus.jsonl"
+DEFAULT_BASELINE = "eval_baseline.json"
+DEFAULT_TODAY = "2025-03-12"
+ENTITY_TYPES = ["department", "semester", "day", "date", "exam_type", "week"]
+NO_INTENT = "none"
+
+
+def load_corpus(path=DEFAULT_CORPUS):
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if not record.get("query"):
+                raise ValueError(f"{path}:{line_no}: record has no query")
+            unknown = set(record.get("entities") or {}) - set(ENTITY_TYPES)
+            if unknown:
+                raise ValueError(f"{path}:{line_no}: unknown entity types {sorted(unknown)}")
+            records.append(record)
+    return records
+
+
+def entity_value(value):
+    return value.isoformat() if isinstance(value, date) else value
+
+
+def precision_recall(pairs):
+    counts = {}
+    for expected, predicted in pairs:
+        for label in {expected, predicted} - {None}:
+            counts.setdefault(label, {"tp": 0, "fp": 0, "fn": 0})
+        if expected == predicted:
+            if expected is not None:
+                counts[expected]["tp"] += 1
+            continue
+        if predicted is not None:
+            counts[predicted]["fp"] += 1
+        if expected is not None:
+            counts[expected]["fn"] += 1
+    
+    scores = {}
+    for label, c in sorted(counts.items()):
+        precision = c["tp"] / (c["tp"] + c["fp"]) if c["tp"] + c["fp"] else 0.0
+        recall = c["tp"] / (c["tp"] + c["fn"]) if c["tp"] + c["fn"] else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        scores[label] = {"precision": precision, "recall": recall, "f1": f1, "support": c["tp"] + c["fn"]}
+    return scores
+
+
+def micro_f1(pairs):
+    tp = sum(1 for e, p in pairs if e is not None and e == p)
+    predicted = sum(1 for _, p in pairs if p is not None)
+    expected = sum(1 for e, _ in pairs if e is not None)
+    precision = tp / predicted if predicted else 0.0
+    recall = tp / expected if expected else 0.0
+    return {"precision": precision, "recall": recall, "f1": 2 * precision * recall / (precision + recall) if precision + recall else 0.0, "support": expected}
+
+
+def run_nlu(engine, records, today, repeat=20):
+    detector = engine.nlu_cache.intent_detector
+    extractor = engine.nlu_cache.entity_extractor
+    # Normalization is memoized in production, so it is applied once up front and not timed
+    queries = [engine.normalizer.normalize(r["query"]) for r in records]
+    
+    predictions = []
+    latencies = []
+    started = time.perf_counter()
+    for query in queries:
+        best = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            intent, _ = detector.detect_intent(query)
+            entities = extractor.extract_all(query, today)
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        predictions.append((intent, entities))
+        latencies.append(best)
+    elapsed = time.perf_counter() - started
+    return predictions, latencies, len(queries) * repeat / elapsed if elapsed else 0.0
+
+
+def check_answers(engine, records):
+    checked = 0
+    failures = []
+    for record in records:
+        expected = record.get("answer_contains")
+        if expected is None and not record.get("source"):
+            continue
+        checked += 1
+        answer = engine.answer(record["query"], dict(record.get("context") or {}))
+        missing = [text for text in expected or [] if text not in answer["response"]]
+        if missing or (record.get("source") and answer["source"] != record["source"]):
+            failures.append({
+                "query": record["query"],
+                "field": "answer",
+                "expected": {"contains": expected, "source": record.get("source")},
+                "got": {"response": answer["response"], "source": answer["source"]}
+            })
+    return checked, failures
+
+
+def evaluate(records, data_dir="data", today=None, repeat=20):
+    today = today or date.fromisoformat(DEFAULT_TODAY)
+    engine = AnswerEngine.create(data_dir=data_dir, provider="stub", model="echo", latency=0)
+    predictions, latencies, throughput = run_nlu(engine, records, today, repeat)
+    
+    failures = []
+    intent_pairs = []
+    entity_pairs = {name: [] for name in ENTITY_TYPES}
+    for record, (intent, entities) in zip(records, predictions):
+        expected_intent = record.get("intent") or NO_INTENT
+        intent_pairs.append((expected_intent, intent or NO_INTENT))
+        if expected_intent != (intent or NO_INTENT):
+            failures.append({"query": record["query"], "field": "intent", "expected": expected_intent, "got": intent or NO_INTENT})
+        
+        expected_entities = record.get("entities") or {}
+        for name in ENTITY_TYPES:
+            expected = expected_entities.get(name)
+            got = entity_value(entities.get(name))
+            entity_pairs[name].append((expected, got))
+            if expected != got:
+                failures.append({"query": record["query"], "field": name, "expected": expected, "got": got})
+    
+    answers_checked, answer_failures = check_answers(engine, records)
+    all_entity_pairs = [pair for pairs in entity_pairs.values() for pair in pairs]
+    
+    return {
+        "queries": len(records),
+        "intent_accuracy": sum(1 for e, p in intent_pairs if e == p) / len(intent_pairs) if intent_pairs else 0.0,
+        "intents": precision_recall(intent_pairs),
+        "entities": {name: micro_f1(pairs) for name, pairs in entity_pairs.items()},
+        "entities_overall": micro_f1(all_entity_pairs),
+        "answers": {
+            "checked": answers_checked,
+            "passed": answers_checked - len(answer_failures),
+            "pass_rate": (answers_checked - len(answer_failures)) / answers_checked if answers_checked else 0.0
+        },
+        "latency_us": {
+            "p50": percentile(latencies, 50) * 1e6,
+            "p95": percentile(latencies, 95) * 1e6,
+            "max": max(latencies, default=0.0) * 1e6
+        },
+        "throughput_qps": throughput,
+        "failures": failures + answer_failures
+    }
+
+
+def load_baseline(path=DEFAULT_BASELINE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(report, path=DEFAULT_BASELINE):
+    baseline = {key: value for key, value in report.items() if key != "failures"}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def compare(report, baseline, max_accuracy_drop=0.0, max_slowdown=0.5):
+    regressions = []
+    
+    def check(name, current, previous):
+        if previous - current > max_accuracy_drop + 1e-9:
+            regressions.append(f"{name} dropped from {previous:.3f} to {current:.3f}")
+    
+    check("intent accuracy", report["intent_accuracy"], baseline["intent_accuracy"])
+    for label, scores in baseline["intents"].items():
+        check(f"intent '{label}' F1", report["intents"].get(label, {}).get("f1", 0.0), scores["f1"])
+    for name, scores in baseline["entities"].items():
+        check(f"entity '{name}' F1", report["entities"].get(name, {}).get("f1", 0.0), scores["f1"])
+    check("answer pass rate", report["answers"]["pass_rate"], baseline["answers"]["pass_rate"])
+    
+    # Speed is machine dependent; max_slowdown=None skips it
+    if max_slowdown is not None and baseline.get("throughput_qps"):
+        floor = baseline["throughput_qps"] * (1 - max_slowdown)
+        if report["throughput_qps"] < floor:
+            regressions.append(f"NLU throughput fell from {baseline['throughput_qps']:.0f} to {report['throughput_qps']:.0f} queries/s (floor {floor:.0f})")
+    return regressions
+
+
+def print_report(report, show_failures=False):
+    print(f"Queries: {report['queries']}  Intent accuracy: {report['intent_accuracy']:.1%}")
+    print()
+    print(f"{'intent':<12} {'precision':>9} {'recall':>7} {'f1':>6} {'support':>8}")
+    for label, s in report["intents"].items():
+        print(f"{label:<12} {s['precision']:>9.2f} {s['recall']:>7.2f} {s['f1']:>6.2f} {s['support']:>8}")
+    print()
+    print(f"{'entity':<12} {'precision':>9} {'recall':>7} {'f1':>6} {'support':>8}")
+    for name, s in list(report["entities"].items()) + [("(all)", report["entities_overall"])]:
+        print(f"{name:<12} {s['precision']:>9.2f} {s['recall']:>7.2f} {s['f1']:>6.2f} {s['support']:>8}")
+    print()
+    answers = report["answers"]
+    print(f"Answers: {answers['passed']}/{answers['checked']} passed")
+    latency = report["latency_us"]
+    print(f"NLU latency (us/query): p50={latency['p50']:.1f} p95={latency['p95']:.1f} max={latency['max']:.1f}")
+    print(f"NLU throughput: {report['throughput_qps']:.0f} queries/s")
+    
+    if show_failures and report["failures"]:
+        print()
+        print("Mismatches:")
+        for failure in report["failures"]:
+            print(f"  [{failure['field']}] {failure['query']!r}: expected {failure['expected']!r}, got {failure['got']!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score intent/entity extraction and answers against a labelled corpus")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Labelled JSONL corpus")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline report to compare against")
+    parser.add_argument("--data-dir", default="data", help="Knowledge base directory for answer checks")
+    parser.add_argument("--today", default=DEFAULT_TODAY, help="Date that relative dates (tomorrow, next Friday) resolve against")
+    parser.add_argument("--repeat", type=int, default=20, help="Timing repetitions per query (the fastest is reported)")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.0, help="Allowed drop in any accuracy/F1 score")
+    parser.add_argument("--max-slowdown", type=float, default=0.5, help="Allowed fractional drop in NLU throughput")
+    parser.add_argument("--no-speed-check", action="store_true", help="Only check accuracy against the baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--show-failures", action="store_true", help="List every mismatched label")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+    
+    report = evaluate(load_corpus(args.corpus), args.data_dir, date.fromisoformat(args.today), args.repeat)
+    
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, args.show_failures)
+    
+    if args.save_baseline:
+        save_baseline(report, args.baseline)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"\n[WARN] No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    
+    regressions = compare(report, baseline, args.max_accuracy_drop, None if args.no_speed_check else args.max_slowdown)
+    if regressions:
+        print("\n[FAIL] Regressions against baseline:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print("\n[OK] No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
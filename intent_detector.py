@@ -1,5 +1,4 @@
 import re
-from typing import Dict, Optional, Tuple, List
 
 
 class IntentDetector:
@@ -8,7 +7,9 @@ class IntentDetector:
             "timetable": [
                 r"timetable", r"schedule", r"class schedule", r"what.*class",
                 r"tomorrow.*class", r"today.*class", r"which.*class",
-                r"when.*class", r"what.*period", r"time.*table"
+                r"when.*class", r"what.*period", r"time.*table",
+                r"class.*week", r"week.*class", r"class.*on.*\d{4}",
+                r"classes\s+(on|this|next|coming|today|tomorrow)\b"
             ],
             "exam": [
                 r"exam", r"examination", r"mid.*sem", r"end.*sem",
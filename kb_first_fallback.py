@@ -0,0 +1,43 @@
+import threading
+
+
+class KBFirstFallback:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {
+            "fallbacks": 0,
+            "kb_answers": 0,
+            "llm_answers": 0,
+            "llm_refused": 0
+        }
+    
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+    
+    def _try_kb(self, kb_fn):
+        self._count("fallbacks")
+        try:
+            return kb_fn()
+        except Exception:
+            return None
+    
+    def run(self, llm_fn, kb_fn, admit=None):
+        # The relaxed match takes microseconds, so the LLM is only called once it has missed
+        kb_result = self._try_kb(kb_fn)
+        if kb_result is not None:
+            self._count("kb_answers")
+            return kb_result, "kb"
+        if admit is not None and not admit():
+            self._count("llm_refused")
+            return None, "refused"
+        
+        self._count("llm_answers")
+        return llm_fn(), "llm"
+    
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        if stats["fallbacks"]:
+            stats["kb_answer_rate"] = stats["kb_answers"] / stats["fallbacks"]
+        return stats
@@ -0,0 +1,115 @@
+import math
+import re
+from collections import Counter
+from token_budget import estimate_tokens
+
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "what", "when", "where", "who", "which",
+    "how", "do", "does", "i", "my", "me", "for", "of", "to", "in", "on", "and",
+    "or", "be", "can", "it", "this", "that", "there", "any", "about", "please"
+}
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class KBRetriever:
+    def __init__(self, kb, k1=1.5, b=0.75):
+        self.kb = kb
+        self.k1 = k1
+        self.b = b
+        self.chunks = []
+        self.postings = {}
+        self.doc_lengths = []
+        self.avg_doc_length = 0.0
+        self.idf = {}
+        self.build_index()
+    
+    def _chunk_kb(self):
+        chunks = []
+        
+        for dept, semesters in self.kb.timetable.items():
+            for sem, days in semesters.items():
+                for day, classes in days.items():
+                    if classes:
+                        chunks.append(f"{dept} {sem} timetable on {day}: {', '.join(classes)}")
+        
+        for exam_type, depts in self.kb.exams.items():
+            exam_name = exam_type.replace("_", " ").title()
+            for dept, semesters in depts.items():
+                for sem, info in semesters.items():
+                    chunks.append(
+                        f"{exam_name} exams for {dept} {sem}: {info.get('start_date', 'N/A')} to "
+                        f"{info.get('end_date', 'N/A')}. Subjects: {', '.join(info.get('subjects', []))}"
+                    )
+        
+        for year, holidays in self.kb.holidays.items():
+            for month_day, name in holidays.items():
+                chunks.append(f"Holiday on {year}-{month_day}: {name}")
+        
+        for section, rules in self.kb.academic_rules.items():
+            if section == "department_contacts":
+                for dept, contact in rules.items():
+                    details = ", ".join(f"{k}: {v}" for k, v in contact.items())
+                    chunks.append(f"{dept} department contact - {details}")
+            elif isinstance(rules, dict):
+                section_name = section.replace("_", " ").capitalize()
+                for key, value in rules.items():
+                    chunks.append(f"{section_name} - {key.replace('_', ' ')}: {value}")
+        
+        return chunks
+    
+    def build_index(self):
+        self.chunks = self._chunk_kb()
+        self.postings = {}
+        self.doc_lengths = []
+        
+        for doc_id, chunk in enumerate(self.chunks):
+            terms = Counter(tokenize(chunk))
+            self.doc_lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings.setdefault(term, []).append((doc_id, tf))
+        
+        n_docs = len(self.chunks)
+        self.avg_doc_length = (sum(self.doc_lengths) / n_docs) if n_docs else 0.0
+        self.idf = {
+            term: math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+    
+    def search(self, query, top_k=3):
+        scores = {}
+        
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_doc_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(score, self.chunks[doc_id]) for doc_id, score in ranked]
+    
+    def build_context(self, query, top_k=3, token_budget=200):
+        snippets = []
+        used = 0
+        
+        for score, chunk in self.search(query, top_k):
+            cost = estimate_tokens(chunk)
+            if used + cost > token_budget:
+                continue
+            snippets.append(chunk)
+            used += cost
+        
+        return "\n".join(snippets)
+    
+    def find_confident_matches(self, query, min_score=4.0, ratio=0.8, top_k=3):
+        results = self.search(query, top_k)
+        if not results or results[0][0] < min_score:
+            return []
+        return [chunk for score, chunk in results if score >= results[0][0] * ratio]
@@ -0,0 +1,276 @@
+import json
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from knowledge_base import KnowledgeBase, get_data_version, holiday_key
+
+
+MAGIC = b"KBSNAP01"
+HEADER = struct.Struct("<8sQQQ")
+SNAPSHOT_FILE = "kb.snapshot"
+
+try:
+    import fcntl
+except ImportError:
+    # No flock on Windows; builds are then only serialized within one process
+    fcntl = None
+
+# How many dict levels of each section are indexed; everything below is one JSON record
+SECTION_DEPTHS = {
+    "timetable": 2,
+    "exams": 3,
+    "holidays": 1,
+    "academic_rules": 1
+}
+
+
+def default_snapshot_path(data_dir="data"):
+    return os.path.join(data_dir, SNAPSHOT_FILE)
+
+
+def _data_signature(data_dir):
+    return [list(entry) for entry in get_data_version(data_dir)]
+
+
+def build_snapshot(data_dir="data", path=None, version=1):
+    path = path or default_snapshot_path(data_dir)
+    signature = _data_signature(data_dir)
+    kb = KnowledgeBase(data_dir)
+    body = bytearray()
+    
+    def encode(node, depth):
+        if depth == 0 or not isinstance(node, dict):
+            blob = json.dumps(node, ensure_ascii=False).encode("utf-8")
+            offset = len(body)
+            body.extend(blob)
+            return [offset, len(blob)]
+        return {key: encode(value, depth - 1) for key, value in node.items()}
+    
+    index = {section: encode(getattr(kb, section), depth) for section, depth in SECTION_DEPTHS.items()}
+    index["_meta"] = {"data_version": signature, "built_at": time.time()}
+    index_blob = json.dumps(index, ensure_ascii=False).encode("utf-8")
+    header = HEADER.pack(MAGIC, version, HEADER.size + len(body), len(index_blob))
+    
+    # Write next to the target and rename, so readers only ever see a complete snapshot
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".kb-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(body)
+            f.write(index_blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def read_snapshot_info(path):
+    try:
+        with open(path, "rb") as f:
+            magic, version, index_offset, index_length = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                return None
+            f.seek(index_offset)
+            index = json.loads(f.read(index_length))
+    except (OSError, ValueError, struct.error):
+        return None
+    return {"version": version, **index.get("_meta", {})}
+
+
+def read_snapshot_version(path):
+    try:
+        with open(path, "rb") as f:
+            magic, version, _, _ = HEADER.unpack(f.read(HEADER.size))
+    except (OSError, struct.error):
+        return None
+    return version if magic == MAGIC else None
+
+
+_build_lock = threading.Lock()
+
+
+@contextmanager
+def _locked_build(path):
+    # Worker processes each have their own thread lock, so the version check, build and replace also hold a file lock
+    with _build_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def ensure_snapshot(data_dir="data", path=None):
+    path = path or default_snapshot_path(data_dir)
+    with _locked_build(path):
+        info = read_snapshot_info(path)
+        if info and info.get("data_version") == _data_signature(data_dir):
+            return path
+        return build_snapshot(data_dir, path, version=(info["version"] if info else 0) + 1)
+
+
+class SnapshotKnowledgeBase:
+    def __init__(self, path, check_interval=1.0, cache_size=128):
+        self.path = path
+        self.check_interval = check_interval
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._records = OrderedDict()
+        self._last_check = time.monotonic()
+        self.reloads = 0
+        self._open()
+    
+    @classmethod
+    def open(cls, data_dir="data", path=None, **kwargs):
+        return cls(ensure_snapshot(data_dir, path), **kwargs)
+    
+    def _open(self):
+        with open(self.path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, index_offset, index_length = HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a knowledge base snapshot")
+        index = json.loads(buffer[index_offset:index_offset + index_length])
+        
+        # Old mappings are left to the garbage collector so in-flight reads never hit a closed map
+        with self._lock:
+            self._buffer = buffer
+            self._index = index
+            self._records.clear()
+            self.version = version
+    
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+        
+        # Workers only compare the header's version counter; rebuilding is left to admin saves
+        version = read_snapshot_version(self.path)
+        if version is None or version == self.version:
+            return False
+        self._open()
+        self.reloads += 1
+        return True
+    
+    def _record(self, section, *keys):
+        self.refresh()
+        with self._lock:
+            buffer = self._buffer
+            node = self._index.get(section)
+            for key in keys:
+                if not isinstance(node, dict) or key not in node:
+                    return None
+                node = node[key]
+            if isinstance(node, dict):
+                return self._materialize(node)
+            
+            cache_key = (section,) + keys
+            if cache_key in self._records:
+                self._records.move_to_end(cache_key)
+                return self._records[cache_key]
+        
+        offset, length = node
+        start = HEADER.size + offset
+        value = json.loads(buffer[start:start + length])
+        
+        with self._lock:
+            if buffer is self._buffer:
+                self._records[cache_key] = value
+                while len(self._records) > self.cache_size:
+                    self._records.popitem(last=False)
+        return value
+    
+    def _materialize(self, node):
+        # Called with the lock held; decodes a whole subtree without touching the record cache
+        result = {}
+        for key, child in node.items():
+            if isinstance(child, dict):
+                result[key] = self._materialize(child)
+            else:
+                offset, length = child
+                start = HEADER.size + offset
+                result[key] = json.loads(self._buffer[start:start + length])
+        return result
+    
+    def _keys(self, section, *keys):
+        self.refresh()
+        with self._lock:
+            node = self._index.get(section, {})
+            for key in keys:
+                node = node.get(key, {}) if isinstance(node, dict) else {}
+            return list(node) if isinstance(node, dict) else []
+    
+    # Full sections are decoded on demand (e.g. to build the retriever index) and not kept
+    @property
+    def timetable(self):
+        return self._record("timetable") or {}
+    
+    @property
+    def exams(self):
+        return self._record("exams") or {}
+    
+    @property
+    def holidays(self):
+        return self._record("holidays") or {}
+    
+    @property
+    def academic_rules(self):
+        return self._record("academic_rules") or {}
+    
+    def get_timetable(self, department, semester, day=None):
+        schedule = self._record("timetable", department.upper(), semester)
+        if schedule is not None and day:
+            return schedule.get(day)
+        return schedule
+    
+    def get_exam_schedule(self, exam_type, department, semester):
+        return self._record("exams", exam_type, department.upper(), semester)
+    
+    def check_holiday(self, date):
+        key = holiday_key(date)
+        if key:
+            year, month_day = key
+            holidays = self._record("holidays", year)
+            if holidays:
+                return holidays.get(month_day)
+        
+        return None
+    
+    def get_credit_requirements(self):
+        return self._record("academic_rules", "credit_requirements") or {}
+    
+    def get_attendance_rules(self):
+        return self._record("academic_rules", "attendance_rules") or {}
+    
+    def get_department_contact(self, department):
+        contacts = self._record("academic_rules", "department_contacts") or {}
+        return contacts.get(department.upper())
+    
+    def get_all_departments(self):
+        return self._keys("timetable")
+    
+    def get_semesters_for_dept(self, department):
+        return self._keys("timetable", department.upper())
+    
+    def get_stats(self):
+        with self._lock:
+            return {
+                "version": self.version,
+                "reloads": self.reloads,
+                "mapped_bytes": len(self._buffer),
+                "cached_records": len(self._records)
+            }
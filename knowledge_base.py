@@ -1,7 +1,32 @@
 import json
 import os
-from datetime import datetime
-from typing import Dict, Optional, List, Any
+from datetime import date as date_type, datetime
+
+
+DATA_FILES = ["timetable.json", "exams.json", "holidays.json", "academic_rules.json"]
+
+
+def get_data_version(data_dir="data"):
+    version = []
+    for filename in DATA_FILES:
+        try:
+            stat = os.stat(os.path.join(data_dir, filename))
+            version.append((filename, stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            version.append((filename, None, None))
+    return tuple(version)
+
+
+def holiday_key(date):
+    if isinstance(date, date_type):
+        return str(date.year), date.strftime("%m-%d")
+    try:
+        if len(date) == 10:
+            date_obj = datetime.strptime(date, "%Y-%m-%d")
+            return str(date_obj.year), date_obj.strftime("%m-%d")
+        return str(datetime.now().year), date
+    except ValueError:
+        return None
 
 
 class KnowledgeBase:
@@ -55,19 +80,11 @@ class KnowledgeBase:
         return None
     
     def check_holiday(self, date):
-        try:
-            if len(date) == 10:
-                date_obj = datetime.strptime(date, "%Y-%m-%d")
-                year = str(date_obj.year)
-                month_day = date_obj.strftime("%m-%d")
-            else:
-                month_day = date
-                year = str(datetime.now().year)
-            
+        key = holiday_key(date)
+        if key:
+            year, month_day = key
             if year in self.holidays:
                 return self.holidays[year].get(month_day)
-        except ValueError:
-            pass
         
         return None
     
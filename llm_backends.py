@@ -0,0 +1,239 @@
+import json
+import os
+import threading
+import time
+from token_budget import estimate_tokens
+
+
+BACKENDS = {}
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def register_backend(name):
+    def decorator(cls):
+        cls.name = name
+        BACKENDS[name] = cls
+        return cls
+    return decorator
+
+
+def get_backend(name, **options):
+    backend_cls = BACKENDS.get(name.lower())
+    if backend_cls is None:
+        return None
+    return backend_cls(**options)
+
+
+def get_available_backends():
+    return list(BACKENDS.keys())
+
+
+def get_cached_client(key, factory):
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = factory()
+                _clients[key] = client
+    return client
+
+
+class LLMBackend:
+    name = None
+    
+    def __init__(self, model, base_url=None, api_key=""):
+        self.model = model
+        self.base_url = base_url
+        self.api_key = api_key
+    
+    def generate(self, query, system_prompt, budget):
+        raise NotImplementedError
+    
+    def stream(self, query, system_prompt, budget):
+        text, prompt_tokens, response_tokens = self.generate(query, system_prompt, budget)
+        yield text
+    
+    def is_available(self):
+        return False
+
+
+@register_backend("openai")
+class OpenAIBackend(LLMBackend):
+    def _client(self):
+        from openai import OpenAI
+        return get_cached_client(("openai", self.api_key), lambda: OpenAI(api_key=self.api_key))
+    
+    def generate(self, query, system_prompt, budget):
+        try:
+            if not self.api_key:
+                return "OpenAI API key not found. Please set OPENAI_API_KEY environment variable or use Ollama instead.", 0, 0
+            
+            response = self._client().chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": query}
+                ],
+                max_tokens=budget.max_response_tokens,
+                temperature=0.7
+            )
+            
+            usage = getattr(response, "usage", None)
+            return (
+                response.choices[0].message.content.strip(),
+                getattr(usage, "prompt_tokens", 0),
+                getattr(usage, "completion_tokens", 0)
+            )
+        
+        except ImportError:
+            return "OpenAI library not installed. Install it with: pip install openai", 0, 0
+        except Exception as e:
+            return f"I encountered an error: {str(e)}. Please check your API key and connection.", 0, 0
+    
+    def stream(self, query, system_prompt, budget):
+        try:
+            if not self.api_key:
+                yield "OpenAI API key not found. Please set OPENAI_API_KEY environment variable or use Ollama instead."
+                return
+            
+            events = self._client().chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": query}
+                ],
+                max_tokens=budget.max_response_tokens,
+                temperature=0.7,
+                stream=True
+            )
+            
+            for event in events:
+                if event.choices and event.choices[0].delta.content:
+                    yield event.choices[0].delta.content
+        
+        except ImportError:
+            yield "OpenAI library not installed. Install it with: pip install openai"
+        except Exception as e:
+            yield f"I encountered an error: {str(e)}. Please check your API key and connection."
+    
+    def is_available(self):
+        return bool(self.api_key)
+
+
+@register_backend("ollama")
+class OllamaBackend(LLMBackend):
+    def __init__(self, model, base_url=None, api_key=""):
+        base_url = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+        super().__init__(model, base_url.rstrip("/"), api_key)
+    
+    def _session(self):
+        import requests
+        return get_cached_client(("ollama", self.base_url), requests.Session)
+    
+    def _payload(self, query, system_prompt, budget, stream):
+        return {
+            "model": self.model,
+            "prompt": f"{system_prompt}\n\nUser: {query}\n\nAssistant:",
+            "stream": stream,
+            "options": {
+                "num_predict": budget.max_response_tokens,
+                "num_ctx": budget.context_window
+            }
+        }
+    
+    def generate(self, query, system_prompt, budget):
+        try:
+            import requests
+        except ImportError:
+            return "Requests library not installed. Install it with: pip install requests", 0, 0
+        
+        try:
+            payload = self._payload(query, system_prompt, budget, stream=False)
+            response = self._session().post(f"{self.base_url}/api/generate", json=payload, timeout=30)
+            
+            if response.status_code == 200:
+                data = response.json()
+                return (
+                    data.get("response", "I couldn't generate a response. Please try again."),
+                    data.get("prompt_eval_count", 0),
+                    data.get("eval_count", 0)
+                )
+            else:
+                return f"Ollama server not accessible. Make sure Ollama is running on {self.base_url}", 0, 0
+        
+        except requests.exceptions.ConnectionError:
+            return "Cannot connect to Ollama. Please make sure Ollama is running locally.", 0, 0
+        except Exception as e:
+            return f"I encountered an error: {str(e)}", 0, 0
+    
+    def stream(self, query, system_prompt, budget):
+        try:
+            import requests
+        except ImportError:
+            yield "Requests library not installed. Install it with: pip install requests"
+            return
+        
+        try:
+            payload = self._payload(query, system_prompt, budget, stream=True)
+            with self._session().post(f"{self.base_url}/api/generate", json=payload, timeout=30, stream=True) as response:
+                if response.status_code != 200:
+                    yield f"Ollama server not accessible. Make sure Ollama is running on {self.base_url}"
+                    return
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    data = json.loads(line)
+                    if data.get("response"):
+                        yield data["response"]
+                    if data.get("done"):
+                        break
+        
+        except requests.exceptions.ConnectionError:
+            yield "Cannot connect to Ollama. Please make sure Ollama is running locally."
+        except Exception as e:
+            yield f"I encountered an error: {str(e)}"
+    
+    def is_available(self):
+        try:
+            response = self._session().get(f"{self.base_url}/api/tags", timeout=5)
+            return response.status_code == 200
+        except Exception:
+            return False
+
+
+@register_backend("stub")
+class StubBackend(LLMBackend):
+    def __init__(self, model="echo", base_url=None, api_key="", latency=None):
+        super().__init__(model, base_url, api_key)
+        if latency is None:
+            latency = float(os.getenv("STUB_LLM_LATENCY", "0"))
+        self.latency = latency
+    
+    def _answer(self, query, system_prompt, budget):
+        words = f"[{self.model}] You asked: {' '.join(query.split())}".split()
+        text = " ".join(words[:budget.max_response_tokens])
+        return text, estimate_tokens(system_prompt) + estimate_tokens(query), estimate_tokens(text)
+    
+    def generate(self, query, system_prompt, budget):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._answer(query, system_prompt, budget)
+    
+    def stream(self, query, system_prompt, budget):
+        text = self._answer(query, system_prompt, budget)[0]
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if self.latency:
+                time.sleep(self.latency / len(words))
+            yield word if i == len(words) - 1 else word + " "
+    
+    def generate_batch(self, items, budget):
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._answer(query, system_prompt, budget) for query, system_prompt in items]
+    
+    def is_available(self):
+        return True
@@ -0,0 +1,236 @@
+import heapq
+import itertools
+import threading
+from contextlib import contextmanager
+
+
+BUSY_MESSAGE = "The helpdesk is handling a lot of questions right now. Please try again in a moment."
+
+# Lower values get a free LLM slot first
+PRIORITY_KB = 0
+PRIORITY_OPEN = 1
+
+
+def with_history(context, history):
+    if not history:
+        return context
+    history = f"Recent conversation:\n{history}"
+    return f"{context}\n\n{history}" if context else history
+
+
+class _PendingCall:
+    def __init__(self, query, context, priority=PRIORITY_OPEN, history=None):
+        self.query = query
+        self.context = context
+        self.priority = priority
+        # History shapes the prompt but not the coalescing key, so a shared question is answered once
+        self.prompt_context = with_history(context, history)
+        self.done = threading.Event()
+        self.result = None
+
+
+class PrioritySlots:
+    def __init__(self, size):
+        self._lock = threading.Lock()
+        self._free = size
+        self._waiting = []
+        self._order = itertools.count()
+        self.queued = 0
+    
+    def acquire(self, priority=PRIORITY_OPEN):
+        with self._lock:
+            if self._free and not self._waiting:
+                self._free -= 1
+                return
+            self.queued += 1
+            ready = threading.Event()
+            heapq.heappush(self._waiting, (priority, next(self._order), ready))
+        ready.wait()
+    
+    def release(self):
+        with self._lock:
+            if self._waiting:
+                # Hand the slot straight to the best waiter so a newcomer cannot take it first
+                heapq.heappop(self._waiting)[2].set()
+            else:
+                self._free += 1
+    
+    @contextmanager
+    def slot(self, priority=PRIORITY_OPEN):
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+    
+    def waiting(self):
+        with self._lock:
+            return len(self._waiting)
+
+
+class LLMDispatcher:
+    def __init__(self, llm, max_concurrency=4, max_queue=32, batch_size=1, batch_window=0.05):
+        self.llm = llm
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        
+        self._lock = threading.Lock()
+        self._batch_ready = threading.Condition(self._lock)
+        self._slots = PrioritySlots(max_concurrency)
+        self._in_flight = {}
+        self._admitted = 0
+        self._pending_batch = []
+        self._flushing = False
+        
+        self.stats = {
+            "requests": 0,
+            "coalesced": 0,
+            "dispatched": 0,
+            "batches": 0,
+            "rejected": 0
+        }
+    
+    def _make_key(self, query, context, history=None):
+        # The history is part of the prompt, so follow-ups from different conversations are never shared
+        return (" ".join(query.lower().split()), context, history or "")
+    
+    def _supports_batching(self):
+        return self.batch_size > 1 and getattr(self.llm, "supports_batching", False)
+    
+    def _admit(self, key, query, context, priority, history):
+        with self._lock:
+            self.stats["requests"] += 1
+            call = self._in_flight.get(key)
+            if call:
+                self.stats["coalesced"] += 1
+                return call, False
+            if self._admitted >= self.max_concurrency + self.max_queue:
+                self.stats["rejected"] += 1
+                return None, False
+            call = _PendingCall(query, context, priority, history)
+            self._in_flight[key] = call
+            self._admitted += 1
+            return call, True
+    
+    def _release(self, key, call):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            self._admitted -= 1
+        call.done.set()
+    
+    def get_response(self, query, context=None, priority=PRIORITY_OPEN, history=None):
+        key = self._make_key(query, context, history)
+        call, leader = self._admit(key, query, context, priority, history)
+        
+        if call is None:
+            return BUSY_MESSAGE
+        if not leader:
+            call.done.wait()
+            return call.result
+        
+        try:
+            if self._supports_batching():
+                self._run_batched(call)
+            else:
+                self._run_single(call)
+        finally:
+            self._release(key, call)
+        
+        return call.result
+    
+    def stream_response(self, query, context=None, priority=PRIORITY_OPEN, history=None):
+        key = self._make_key(query, context, history)
+        call, leader = self._admit(key, query, context, priority, history)
+        
+        if call is None:
+            yield BUSY_MESSAGE
+            return
+        if not leader:
+            call.done.wait()
+            yield call.result
+            return
+        
+        stream = getattr(self.llm, "stream_response", None)
+        chunks = []
+        try:
+            with self._slots.slot(priority):
+                with self._lock:
+                    self.stats["dispatched"] += 1
+                try:
+                    if stream is None:
+                        chunks.append(self.llm.get_response(query, call.prompt_context))
+                        yield chunks[-1]
+                    else:
+                        for chunk in stream(query, call.prompt_context):
+                            chunks.append(chunk)
+                            yield chunk
+                except Exception as e:
+                    chunks.append(f"I encountered an error: {str(e)}")
+                    yield chunks[-1]
+        finally:
+            call.result = "".join(chunks)
+            self._release(key, call)
+    
+    def _run_single(self, call):
+        with self._slots.slot(call.priority):
+            with self._lock:
+                self.stats["dispatched"] += 1
+            try:
+                call.result = self.llm.get_response(call.query, call.prompt_context)
+            except Exception as e:
+                call.result = f"I encountered an error: {str(e)}"
+    
+    def _run_batched(self, call):
+        with self._lock:
+            self._pending_batch.append(call)
+            if self._flushing:
+                self._batch_ready.notify()
+                flusher = False
+            else:
+                self._flushing = True
+                flusher = True
+        
+        if not flusher:
+            call.done.wait()
+            return
+        
+        while True:
+            with self._lock:
+                self._batch_ready.wait_for(lambda: len(self._pending_batch) >= self.batch_size, timeout=self.batch_window)
+                self._pending_batch.sort(key=lambda c: c.priority)
+                batch = self._pending_batch[:self.batch_size]
+                del self._pending_batch[:self.batch_size]
+            
+            self._dispatch_batch(batch)
+            
+            with self._lock:
+                if not self._pending_batch:
+                    self._flushing = False
+                    return
+    
+    def _dispatch_batch(self, batch):
+        with self._slots.slot(min(c.priority for c in batch)):
+            with self._lock:
+                self.stats["dispatched"] += len(batch)
+                self.stats["batches"] += 1
+            try:
+                results = self.llm.get_batch_response([(c.query, c.prompt_context) for c in batch])
+            except Exception as e:
+                results = [f"I encountered an error: {str(e)}"] * len(batch)
+        
+        for c, result in zip(batch, results):
+            c.result = result
+            c.done.set()
+    
+    def is_available(self):
+        return self.llm.is_available()
+    
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["in_flight"] = len(self._in_flight)
+        stats["queued"] = self._slots.queued
+        stats["waiting"] = self._slots.waiting()
+        return stats
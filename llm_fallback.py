@@ -1,90 +1,104 @@
 import os
-from typing import Optional
+import time
+from collections import deque
+from token_budget import TokenBudget, estimate_tokens
+from llm_backends import get_backend
+
+
+_env_loaded = False
+
+
+def load_env():
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        return
+    load_dotenv()
 
 
 class LLMFallback:
-    def __init__(self, provider="openai", model="gpt-3.5-turbo"):
+    def __init__(self, provider="openai", model="gpt-3.5-turbo", base_url=None, budget=None, **backend_options):
         self.provider = provider.lower()
         self.model = model
-        try:
-            from dotenv import load_dotenv
-            load_dotenv()
-        except ImportError:
-            pass
+        load_env()
         self.api_key = os.getenv("OPENAI_API_KEY", "")
+        self.budget = budget or TokenBudget()
+        self.usage = deque(maxlen=500)
+        self.backend = get_backend(self.provider, model=model, base_url=base_url, api_key=self.api_key, **backend_options)
+        self.supports_batching = hasattr(self.backend, "generate_batch")
     
-    def get_response(self, query, context=None):
-        system_prompt = "You are a college helpdesk assistant. Answer in short and simple language. Be helpful and concise."
+    def _build_system_prompt(self, query, context):
+        system_prompt = "You are a college helpdesk assistant. Answer in short and simple language. Be helpful and concise. If relevant college information is given, answer only from it."
         
         if context:
+            context = self.budget.fit_prompt(system_prompt, query, context)
             system_prompt += f"\n\nPrevious conversation context: {context}"
         
-        if self.provider == "openai":
-            return self._get_openai_response(query, system_prompt)
-        elif self.provider == "ollama":
-            return self._get_ollama_response(query, system_prompt)
-        else:
+        return system_prompt
+    
+    def _record_usage(self, query, system_prompt, response, prompt_tokens, response_tokens, latency):
+        self.usage.append({
+            "provider": self.provider,
+            "model": self.model,
+            "prompt_tokens": prompt_tokens or estimate_tokens(system_prompt) + estimate_tokens(query),
+            "response_tokens": response_tokens or estimate_tokens(response),
+            "latency": latency
+        })
+    
+    def get_response(self, query, context=None):
+        if self.backend is None:
             return "I apologize, but I'm having trouble processing your query. Please try rephrasing your question."
+        
+        system_prompt = self._build_system_prompt(query, context)
+        
+        start = time.perf_counter()
+        response, prompt_tokens, response_tokens = self.backend.generate(query, system_prompt, self.budget)
+        self._record_usage(query, system_prompt, response, prompt_tokens, response_tokens, time.perf_counter() - start)
+        return response
     
-    def _get_openai_response(self, query, system_prompt):
-        try:
-            from openai import OpenAI
-            
-            if not self.api_key:
-                return "OpenAI API key not found. Please set OPENAI_API_KEY environment variable or use Ollama instead."
-            
-            client = OpenAI(api_key=self.api_key)
-            
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": query}
-                ],
-                max_tokens=200,
-                temperature=0.7
-            )
-            
-            return response.choices[0].message.content.strip()
+    def stream_response(self, query, context=None):
+        if self.backend is None:
+            yield "I apologize, but I'm having trouble processing your query. Please try rephrasing your question."
+            return
         
-        except ImportError:
-            return "OpenAI library not installed. Install it with: pip install openai"
-        except Exception as e:
-            return f"I encountered an error: {str(e)}. Please check your API key and connection."
+        system_prompt = self._build_system_prompt(query, context)
+        
+        start = time.perf_counter()
+        chunks = []
+        for chunk in self.backend.stream(query, system_prompt, self.budget):
+            chunks.append(chunk)
+            yield chunk
+        self._record_usage(query, system_prompt, "".join(chunks), 0, 0, time.perf_counter() - start)
     
-    def _get_ollama_response(self, query, system_prompt):
-        try:
-            import requests
-            
-            url = "http://localhost:11434/api/generate"
-            payload = {
-                "model": self.model,
-                "prompt": f"{system_prompt}\n\nUser: {query}\n\nAssistant:",
-                "stream": False
-            }
-            
-            response = requests.post(url, json=payload, timeout=30)
-            
-            if response.status_code == 200:
-                return response.json().get("response", "I couldn't generate a response. Please try again.")
-            else:
-                return "Ollama server not accessible. Make sure Ollama is running on localhost:11434"
+    def get_batch_response(self, items):
+        prompts = [(query, self._build_system_prompt(query, context)) for query, context in items]
+        
+        start = time.perf_counter()
+        results = self.backend.generate_batch(prompts, self.budget)
+        latency = time.perf_counter() - start
         
-        except ImportError:
-            return "Requests library not installed. Install it with: pip install requests"
-        except requests.exceptions.ConnectionError:
-            return "Cannot connect to Ollama. Please make sure Ollama is running locally."
-        except Exception as e:
-            return f"I encountered an error: {str(e)}"
+        responses = []
+        for (query, system_prompt), (response, prompt_tokens, response_tokens) in zip(prompts, results):
+            self._record_usage(query, system_prompt, response, prompt_tokens, response_tokens, latency)
+            responses.append(response)
+        return responses
+    
+    def get_usage_stats(self):
+        calls = list(self.usage)
+        if not calls:
+            return {"calls": 0, "prompt_tokens": 0, "response_tokens": 0, "avg_latency": 0.0}
+        return {
+            "calls": len(calls),
+            "prompt_tokens": sum(c["prompt_tokens"] for c in calls),
+            "response_tokens": sum(c["response_tokens"] for c in calls),
+            "avg_latency": sum(c["latency"] for c in calls) / len(calls)
+        }
     
     def is_available(self):
-        if self.provider == "openai":
-            return bool(self.api_key)
-        elif self.provider == "ollama":
-            try:
-                import requests
-                response = requests.get("http://localhost:11434/api/tags", timeout=5)
-                return response.status_code == 200
-            except:
-                return False
-        return False
+        if self.backend is None:
+            return False
+        return self.backend.is_available()
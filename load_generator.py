@@ -0,0 +1,192 @@
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from answer_engine import AnswerEngine, FALLBACK_SOURCES
+from rate_limiter import RateLimiter
+from intent_detector import IntentDetector
+
+
+DEPARTMENTS = ["CSE", "ECE", "ME"]
+SEMESTERS = ["sem 1", "sem 3", "semester 4"]
+DAYS = ["Monday", "Tuesday", "Friday", "tomorrow"]
+FOLLOW_UPS = ["What about Tuesday?", "And for semester 4?", "What about ECE?"]
+OUT_OF_SCOPE = ["Where is the canteen?", "How do I get my hall ticket?", "What are the library timings?"]
+QUERY_KEYS = ["query", "content", "text", "message", "prompt"]
+
+
+def pattern_to_query(pattern):
+    return " ".join(pattern.replace(".*", " ").split())
+
+
+def synthetic_trace(count, sessions, seed=0):
+    rng = random.Random(seed)
+    patterns = IntentDetector().intent_patterns
+    intents = list(patterns)
+    trace = []
+    
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.15:
+            query = rng.choice(FOLLOW_UPS)
+        elif roll < 0.25:
+            query = rng.choice(OUT_OF_SCOPE)
+        else:
+            intent = rng.choice(intents)
+            query = pattern_to_query(rng.choice(patterns[intent]))
+            if intent in ("timetable", "exam", "contact"):
+                query += f" for {rng.choice(DEPARTMENTS)}"
+            if intent in ("timetable", "exam"):
+                query += f" {rng.choice(SEMESTERS)}"
+            if intent == "timetable" and rng.random() < 0.5:
+                query += f" on {rng.choice(DAYS)}"
+        trace.append({"session": f"s{rng.randrange(sessions)}", "query": query})
+    
+    return trace
+
+
+def load_trace(path, sessions):
+    trace = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get("role", "user") != "user":
+                continue
+            query = next((record[k] for k in QUERY_KEYS if record.get(k)), None)
+            if not query:
+                continue
+            session = record.get("session") or record.get("session_id") or f"s{line_no % sessions}"
+            trace.append({"session": str(session), "query": query})
+    return trace
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_load(engine, trace, qps=None):
+    per_session = {}
+    for i, item in enumerate(trace):
+        per_session.setdefault(item["session"], []).append((i, item["query"]))
+    
+    results = []
+    results_lock = threading.Lock()
+    start = time.perf_counter()
+    
+    def session_worker(session, turns):
+        context = {"department": None, "semester": None, "last_intent": None}
+        history = []
+        for index, query in turns:
+            if qps:
+                delay = start + index / qps - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            
+            history.append({"role": "user", "content": query})
+            t0 = time.perf_counter()
+            answer = engine.answer(query, context, history[:-1], session_id=session)
+            latency = time.perf_counter() - t0
+            history.append({"role": "assistant", "content": answer["response"]})
+            
+            with results_lock:
+                results.append({"latency": latency, "source": answer["source"], "intent": answer["intent"]})
+    
+    threads = [threading.Thread(target=session_worker, args=(session, turns)) for session, turns in per_session.items()]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    
+    return results, time.perf_counter() - start, len(per_session)
+
+
+def summarize(results, elapsed, sessions):
+    latencies = [r["latency"] for r in results]
+    sources = Counter(r["source"] for r in results)
+    fallbacks = sum(count for source, count in sources.items() if source in FALLBACK_SOURCES)
+    return {
+        "queries": len(results),
+        "sessions": sessions,
+        "elapsed_s": elapsed,
+        "throughput_qps": len(results) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p90": percentile(latencies, 90) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": max(latencies, default=0.0) * 1000
+        },
+        "fallback_rate": fallbacks / len(results) if results else 0.0,
+        "sources": dict(sources),
+        "intents": dict(Counter(str(r["intent"]) for r in results))
+    }
+
+
+def print_report(report):
+    print(f"Queries: {report['queries']} across {report['sessions']} sessions in {report['elapsed_s']:.2f}s")
+    print(f"Throughput: {report['throughput_qps']:.1f} queries/s")
+    latency = report["latency_ms"]
+    print(f"Latency (ms): p50={latency['p50']:.2f} p90={latency['p90']:.2f} p95={latency['p95']:.2f} p99={latency['p99']:.2f} max={latency['max']:.2f}")
+    print(f"Fallback rate: {report['fallback_rate']:.1%}")
+    print(f"Answer sources: {report['sources']}")
+    print(f"Intents: {report['intents']}")
+    if "rate_limiter" in report:
+        print(f"Rate limiter: {report['rate_limiter']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay or synthesize helpdesk traffic against the answer engine")
+    parser.add_argument("--trace", help="JSONL trace to replay (one object per line with a query/content field)")
+    parser.add_argument("--queries", type=int, default=500, help="Number of synthetic queries when no trace is given")
+    parser.add_argument("--sessions", type=int, default=20, help="Number of concurrent sessions")
+    parser.add_argument("--qps", type=float, default=None, help="Target queries per second (default: as fast as possible)")
+    parser.add_argument("--provider", default="stub", help="LLM provider for fallback queries")
+    parser.add_argument("--model", default="echo", help="LLM model name")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Simulated latency for the stub provider (seconds)")
+    parser.add_argument("--data-dir", default="data", help="Knowledge base directory")
+    parser.add_argument("--session-per-minute", type=float, default=None, help="Rate limit LLM fallback calls per session (default: unlimited)")
+    parser.add_argument("--global-per-minute", type=float, default=None, help="Rate limit LLM fallback calls across all sessions (default: unlimited)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for synthetic traffic")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+    
+    llm_options = {"latency": args.llm_latency} if args.provider == "stub" else {}
+    rate_limiter = None
+    if args.session_per_minute or args.global_per_minute:
+        rate_limiter = RateLimiter(session_per_minute=args.session_per_minute, global_per_minute=args.global_per_minute)
+    engine = AnswerEngine.create(data_dir=args.data_dir, provider=args.provider, model=args.model, rate_limiter=rate_limiter, **llm_options)
+    
+    if args.trace:
+        trace = load_trace(args.trace, args.sessions)
+    else:
+        trace = synthetic_trace(args.queries, args.sessions, args.seed)
+    
+    if not trace:
+        print("[ERROR] No queries to replay")
+        return 1
+    
+    results, elapsed, sessions = run_load(engine, trace, args.qps)
+    report = summarize(results, elapsed, sessions)
+    if rate_limiter:
+        report["rate_limiter"] = rate_limiter.get_stats()
+    
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import threading
+from collections import OrderedDict
+from datetime import date
+from date_parser import RELATIVE_DATE_RE
+
+
+class NLUCache:
+    def __init__(self, intent_detector, entity_extractor, maxsize=4096):
+        self.intent_detector = intent_detector
+        self.entity_extractor = entity_extractor
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+    
+    def analyze(self, query):
+        today = date.today()
+        
+        with self._lock:
+            entry = self._entries.get(query)
+            if entry is not None:
+                intent, confidence, entities, computed_on = entry
+                if computed_on is None or computed_on == today:
+                    self._entries.move_to_end(query)
+                    self.hits += 1
+                    return intent, confidence, dict(entities)
+                del self._entries[query]
+                self.expired += 1
+            self.misses += 1
+        
+        intent, confidence = self.intent_detector.detect_intent(query)
+        entities = self.entity_extractor.extract_all(query)
+        computed_on = today if RELATIVE_DATE_RE.search(query) else None
+        
+        with self._lock:
+            self._entries[query] = (intent, confidence, entities, computed_on)
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        
+        return intent, confidence, dict(entities)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "size": len(self._entries),
+                "hit_rate": self.hits / total if total else 0.0
+            }
@@ -0,0 +1,121 @@
+import os
+import re
+from functools import lru_cache
+from itertools import combinations
+from date_parser import MONTHS, WEEKDAYS, RELATIVE_DAYS
+
+
+ENGLISH_WORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "english_words.txt")
+
+# Words the date parser reads; "may" must never be corrected to "many"
+DATE_WORDS = set(MONTHS) | set(WEEKDAYS) | set(RELATIVE_DAYS) | {"this", "next", "coming", "weekend", "of"}
+
+WORD_RE = re.compile(r"[a-z]+")
+POSSESSIVE_RE = re.compile(r"'s\b")
+SEPARATOR_RE = re.compile(r"(?<!\d)[-/]|[-/](?!\d)")
+PUNCTUATION_RE = re.compile(r"[^a-z0-9\s/-]")
+SPACES_RE = re.compile(r"\s+")
+
+
+def edit_distance(a, b, max_distance):
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    
+    prev_prev = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(prev[j] + 1, current[j - 1] + 1, prev[j - 1] + cost)
+            if prev_prev is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], prev_prev[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        prev_prev, prev = prev, current
+    return prev[-1]
+
+
+@lru_cache(maxsize=None)
+def load_english_words(path=ENGLISH_WORDS_PATH):
+    # Loaded once per process and shared by every normalizer
+    with open(path, "r", encoding="utf-8") as f:
+        return frozenset(line.strip() for line in f if line.strip() and not line.startswith("#"))
+
+
+def pattern_words(patterns):
+    words = set()
+    for pattern in patterns:
+        cleaned = pattern.replace("\\b", " ").replace("\\s", " ").replace("\\d", " ")
+        words.update(WORD_RE.findall(cleaned))
+    return words
+
+
+class QueryNormalizer:
+    def __init__(self, vocabulary, known_words=None, max_distance=2, min_word_length=3, cache_size=4096):
+        self.max_distance = max_distance
+        self.min_word_length = min_word_length
+        self.targets = {w for w in vocabulary if len(w) >= 4}
+        self.known_words = set(vocabulary) | set(known_words or [])
+        self.dictionary = load_english_words()
+        self.deletes = {}
+        for word in self.targets:
+            for variant in self._deletes(word, max_distance):
+                self.deletes.setdefault(variant, set()).add(word)
+        self.normalize = lru_cache(maxsize=cache_size)(self._normalize)
+    
+    @classmethod
+    def from_nlu(cls, intent_detector, entity_extractor, known_words=None, **kwargs):
+        patterns = [p for intent_patterns in intent_detector.intent_patterns.values() for p in intent_patterns]
+        patterns += entity_extractor.department_patterns + entity_extractor.semester_patterns
+        patterns += entity_extractor.day_patterns + entity_extractor.exam_type_patterns
+        return cls(pattern_words(patterns), known_words=DATE_WORDS | set(known_words or []), **kwargs)
+    
+    def _deletes(self, word, distance):
+        variants = {word}
+        for d in range(1, min(distance, len(word) - 1) + 1):
+            for positions in combinations(range(len(word)), d):
+                variants.add("".join(c for i, c in enumerate(word) if i not in positions))
+        return variants
+    
+    def _max_distance_for(self, word):
+        return 1 if len(word) < 7 else self.max_distance
+    
+    def correct_word(self, word):
+        # Only out-of-dictionary tokens are corrected, so "past" or "held" never turn into "pass" or "head"
+        if word in self.known_words or word in self.dictionary or len(word) < self.min_word_length or not word.isalpha():
+            return word
+        
+        max_distance = self._max_distance_for(word)
+        candidates = set()
+        for variant in self._deletes(word, max_distance):
+            candidates.update(self.deletes.get(variant, ()))
+        
+        ranked = sorted(
+            (edit_distance(word, candidate, max_distance), abs(len(candidate) - len(word)), candidate)
+            for candidate in candidates
+        )
+        ranked = [key for key in ranked if key[0] <= max_distance]
+        if not ranked:
+            return word
+        # A tie at the closest distance is ambiguous, so the word is left for the intent patterns to judge
+        if len(ranked) > 1 and ranked[1][0] == ranked[0][0]:
+            return word
+        return ranked[0][2]
+    
+    def _normalize(self, query):
+        text = POSSESSIVE_RE.sub("", query.lower())
+        text = PUNCTUATION_RE.sub(" ", text)
+        text = SEPARATOR_RE.sub(" ", text)
+        words = SPACES_RE.sub(" ", text).strip().split(" ")
+        return " ".join(self.correct_word(w) for w in words if w)
+    
+    def get_stats(self):
+        info = self.normalize.cache_info()
+        total = info.hits + info.misses
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "hit_rate": info.hits / total if total else 0.0
+        }
@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    def __init__(self, per_minute, burst, now):
+        self.rate = per_minute / 60.0
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = now
+    
+    def take(self, now, tokens=1):
+        self.tokens = min(self.capacity, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = max(now, self.updated)
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+    
+    def give_back(self, tokens=1):
+        self.tokens = min(self.capacity, self.tokens + tokens)
+
+
+class RateLimiter:
+    def __init__(self, session_per_minute=6, session_burst=3, global_per_minute=60, global_burst=10, max_sessions=10000, clock=time.monotonic):
+        self.clock = clock
+        self.session_per_minute = session_per_minute
+        self.session_burst = session_burst
+        self.max_sessions = max_sessions
+        # None disables that level of limiting
+        self._global = TokenBucket(global_per_minute, global_burst, clock()) if global_per_minute is not None else None
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.stats = {
+            "allowed": 0,
+            "session_limited": 0,
+            "global_limited": 0
+        }
+    
+    def _session_bucket(self, session_id, now):
+        bucket = self._sessions.get(session_id)
+        if bucket is None:
+            bucket = TokenBucket(self.session_per_minute, self.session_burst, now)
+            self._sessions[session_id] = bucket
+            # Forgetting the least recently seen session only hands it a fresh burst
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(session_id)
+        return bucket
+    
+    def allow(self, session_id=None):
+        now = self.clock()
+        with self._lock:
+            bucket = None
+            if session_id is not None and self.session_per_minute is not None:
+                bucket = self._session_bucket(session_id, now)
+            if bucket is not None and not bucket.take(now):
+                self.stats["session_limited"] += 1
+                return False
+            if self._global is not None and not self._global.take(now):
+                # A session is not charged for a call the global budget refused
+                if bucket is not None:
+                    bucket.give_back()
+                self.stats["global_limited"] += 1
+                return False
+            self.stats["allowed"] += 1
+            return True
+    
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["sessions"] = len(self._sessions)
+            if self._global is not None:
+                stats["global_tokens"] = round(self._global.tokens, 2)
+        total = stats["allowed"] + stats["session_limited"] + stats["global_limited"]
+        stats["limited_rate"] = (total - stats["allowed"]) / total if total else 0.0
+        return stats
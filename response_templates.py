@@ -0,0 +1,169 @@
+import json
+from datetime import date
+from string import Formatter
+
+
+FORMATS = ("text", "markdown", "json")
+MISSING = "N/A"
+
+TEMPLATES = {
+    "text": {
+        "message": "{text}",
+        "timetable_day": "Classes on {day}:\n  {classes[]}",
+        "timetable_no_classes": "No classes scheduled for {day} for {department} {semester}.",
+        "timetable_week": "Weekly Timetable:\n\n{days[]:timetable_week_day}",
+        "timetable_week_day": "{day}:\n  {classes[]}\n",
+        "exam": "{exam_name} Exam Schedule for {department} {semester}:\n\nExam Schedule:\n\nStart Date: {start_date}\nEnd Date: {end_date}\nSubjects:\n  {subjects[]}\n",
+        "calendar_day": "Classes on {label}:\n  {classes[]}",
+        "calendar_holiday": "No classes on {label}: it's a holiday ({holiday}).",
+        "calendar_exams": "No regular classes on {label}: exams are scheduled.\n{exams[]:calendar_exam}",
+        "calendar_exam": "{exam_name} Exams:\n  {subjects[]}",
+        "calendar_empty": "No classes scheduled for {label}.",
+        "calendar_week": "Timetable for {department} {semester}, week of {week_start}:\n\n{days[]:calendar_week_day}",
+        "calendar_week_day": "{weekday} {date}:{summary}\n  {classes[]}",
+        "holiday": "Yes, {when} is a holiday: {holiday}",
+        "not_holiday": "No, {when} is not a holiday.",
+        "credits": "Credit Requirements:\n\nMinimum credits to pass: {minimum_credits_to_pass}\nCredits per semester: {credits_per_semester}\nTotal credits for degree: {total_credits_for_degree}\nMinimum attendance required: {minimum_attendance_percentage}%\nBacklogs allowed: {backlog_allowed}\n",
+        "attendance": "Attendance Rules:\n\nMinimum attendance required: {minimum_percentage}%\nBelow {threshold}%: {consequences_below_75}\nMedical leave allowed: {medical_leave_allowed}\nLeave application process: {leave_application_process}\n",
+        "contact": "{department} Department Contacts:\n\nHOD: {HOD}\nEmail: {email}\nPhone: {phone}\nOffice Location: {office_location}\n"
+    },
+    "markdown": {
+        "message": "{text}",
+        "timetable_day": "**Classes on {day}:**\n\n- {classes[]}",
+        "timetable_no_classes": "No classes scheduled for **{day}** for {department} {semester}.",
+        "timetable_week": "**Weekly Timetable**\n\n{days[]:timetable_week_day}",
+        "timetable_week_day": "**{day}:**\n\n- {classes[]}\n",
+        "exam": "**{exam_name} Exam Schedule for {department} {semester}**\n\n| Start Date | End Date |\n|---|---|\n| {start_date} | {end_date} |\n\n**Subjects:**\n\n- {subjects[]}",
+        "calendar_day": "**Classes on {label}:**\n\n- {classes[]}",
+        "calendar_holiday": "No classes on **{label}**: it's a holiday ({holiday}).",
+        "calendar_exams": "No regular classes on **{label}**: exams are scheduled.\n\n{exams[]:calendar_exam}",
+        "calendar_exam": "**{exam_name} Exams:**\n\n- {subjects[]}\n",
+        "calendar_empty": "No classes scheduled for **{label}**.",
+        "calendar_week": "**Timetable for {department} {semester}, week of {week_start}**\n\n{days[]:calendar_week_day}",
+        "calendar_week_day": "**{weekday} {date}:**{summary}\n\n- {classes[]}\n",
+        "holiday": "Yes, **{when}** is a holiday: {holiday}",
+        "not_holiday": "No, **{when}** is not a holiday.",
+        "credits": "**Credit Requirements**\n\n- Minimum credits to pass: **{minimum_credits_to_pass}**\n- Credits per semester: **{credits_per_semester}**\n- Total credits for degree: **{total_credits_for_degree}**\n- Minimum attendance required: **{minimum_attendance_percentage}%**\n- Backlogs allowed: **{backlog_allowed}**",
+        "attendance": "**Attendance Rules**\n\n- Minimum attendance required: **{minimum_percentage}%**\n- Below {threshold}%: {consequences_below_75}\n- Medical leave allowed: {medical_leave_allowed}\n- Leave application process: {leave_application_process}",
+        "contact": "**{department} Department Contacts**\n\n- HOD: {HOD}\n- Email: {email}\n- Phone: {phone}\n- Office Location: {office_location}"
+    }
+}
+
+
+class TemplateValues(dict):
+    def __missing__(self, key):
+        return MISSING
+
+
+def format_value(value):
+    if value is None:
+        return MISSING
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+class StaticLines:
+    def __init__(self, source):
+        self.source = source
+    
+    def render(self, values, templates):
+        try:
+            return self.source.format_map(values)
+        except KeyError:
+            return self.source.format_map(TemplateValues(values))
+
+
+class RepeatedLine:
+    def __init__(self, field, subtemplate, prefix, suffix, last):
+        self.field = field
+        self.subtemplate = subtemplate
+        self.prefix = prefix
+        self.suffix = suffix
+        # Lines are joined with newlines, so only a repeated line that ends the template has no trailing one
+        self.separator = suffix + "\n" + prefix
+        self.end = suffix if last else suffix + "\n"
+    
+    def render(self, values, templates):
+        items = values.get(self.field)
+        if not items:
+            return ""
+        if self.subtemplate:
+            template = templates[self.subtemplate]
+            items = [template.render(item, templates) for item in items]
+        try:
+            joined = self.separator.join(items)
+        except TypeError:
+            joined = self.separator.join(map(format_value, items))
+        return self.prefix + joined + self.end
+
+
+def parse_line(line):
+    parsed = list(Formatter().parse(line))
+    repeats = [field for _, field, _, _ in parsed if field is not None and field.endswith("[]")]
+    if repeats and (len(parsed) > 2 or len(repeats) > 1 or (len(parsed) > 1 and parsed[1][1] is not None)):
+        raise ValueError(f"A repeated line may only contain one list field and literal text: {line!r}")
+    for _, field, _, _ in parsed:
+        if field is not None and not field.rstrip("[]").isidentifier():
+            raise ValueError(f"Invalid template field: {field!r}")
+    return parsed, bool(repeats)
+
+
+class CompiledTemplate:
+    def __init__(self, source):
+        # Runs of ordinary lines become one format string; a line with a list field is joined per item
+        self.parts = []
+        static = []
+        lines = source.split("\n")
+        for index, line in enumerate(lines):
+            last = index == len(lines) - 1
+            parsed, repeated = parse_line(line)
+            if not repeated:
+                static.append(line if last else line + "\n")
+                continue
+            if "".join(static):
+                self.parts.append(StaticLines("".join(static)))
+            static = []
+            literal, field, spec, _ = parsed[0]
+            suffix = parsed[1][0] if len(parsed) > 1 else ""
+            self.parts.append(RepeatedLine(field[:-2], spec or None, literal, suffix, last))
+        if "".join(static):
+            self.parts.append(StaticLines("".join(static)))
+        self.source = source
+        self._renderers = [part.render for part in self.parts]
+        if len(self.parts) == 1:
+            # Most templates are a single format string, so they skip the join entirely
+            self.render = self.parts[0].render
+    
+    def render(self, values, templates):
+        return "".join([render(values, templates) for render in self._renderers])
+
+
+class CompiledTemplates(dict):
+    # Templates are compiled on first use, so importing the module (or serving only one format) stays cheap
+    def __init__(self, sources):
+        super().__init__()
+        self.sources = sources
+    
+    def __missing__(self, name):
+        template = self[name] = CompiledTemplate(self.sources[name])
+        return template
+
+
+def compile_templates(sources):
+    return {fmt: CompiledTemplates(templates) for fmt, templates in sources.items()}
+
+
+COMPILED_TEMPLATES = compile_templates(TEMPLATES)
+
+
+JSON_ENCODER = json.JSONEncoder(default=format_value, ensure_ascii=False)
+
+
+def render(name, values, fmt="text"):
+    if fmt == "json":
+        return JSON_ENCODER.encode({"type": name, **values})
+    templates = COMPILED_TEMPLATES.get(fmt)
+    if templates is None:
+        raise ValueError(f"Unknown response format: {fmt}. Available: {', '.join(FORMATS)}")
+    return templates[name].render(values, templates)
@@ -0,0 +1,258 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from knowledge_base import KnowledgeBase, get_data_version
+from kb_snapshot import SnapshotKnowledgeBase, default_snapshot_path, ensure_snapshot
+from intent_detector import IntentDetector
+from entity_extractor import EntityExtractor, DEFAULT_DEPARTMENT_MAP
+from kb_retriever import KBRetriever
+from query_normalizer import QueryNormalizer
+from nlu_cache import NLUCache
+from academic_calendar import CalendarMaterializer
+from answer_engine import AnswerEngine
+
+
+DEFAULT_TENANT = "default"
+TENANT_ID_RE = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+DEPARTMENTS_FILE = "departments.json"
+
+
+def deep_sizeof(obj, seen=None):
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+def load_department_map(data_dir, kb):
+    path = os.path.join(data_dir, DEPARTMENTS_FILE)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            departments = json.load(f)
+        department_map = {}
+        for code, aliases in departments.items():
+            for alias in [code] + list(aliases):
+                department_map[alias.lower()] = code.upper()
+        return department_map
+    
+    department_map = dict(DEFAULT_DEPARTMENT_MAP)
+    for code in kb.get_all_departments():
+        department_map.setdefault(code.lower(), code.upper())
+    return department_map
+
+
+class Tenant:
+    def __init__(self, tenant_id, data_dir, kb, entity_extractor, intent_detector, data_version):
+        self.tenant_id = tenant_id
+        self.data_dir = data_dir
+        self.data_version = data_version
+        self.kb = kb
+        self.entity_extractor = entity_extractor
+        self.retriever = KBRetriever(kb)
+        self.normalizer = QueryNormalizer.from_nlu(intent_detector, entity_extractor, known_words=self.retriever.idf)
+        self.nlu_cache = NLUCache(intent_detector, entity_extractor)
+        self.calendar = CalendarMaterializer(kb)
+        self.loaded_at = time.monotonic()
+        self.last_used = self.loaded_at
+        self.requests = 0
+        self.memory_bytes = 0
+        self.measured_at = None
+    
+    def measure_memory(self):
+        # The intent detector and English word list are shared by all tenants, so they are not counted here
+        objects = [self.kb, self.entity_extractor, self.retriever, self.normalizer, self.nlu_cache, self.calendar]
+        self.measured_at = time.monotonic()
+        try:
+            self.memory_bytes = deep_sizeof(objects, {id(self.nlu_cache.intent_detector), id(self.normalizer.dictionary)})
+        except RuntimeError:
+            # A cache grew while it was being walked; keep the previous figure until the next measurement
+            pass
+        return self.memory_bytes
+    
+    def engine(self, llm, fallback=None, budget=None, response_format="text", rate_limiter=None):
+        return AnswerEngine(self.kb, self.retriever, self.normalizer, self.nlu_cache, llm, fallback, budget, self.calendar, response_format, rate_limiter)
+
+
+class TenantRegistry:
+    def __init__(self, root="tenants", default_data_dir="data", max_tenants=8, idle_timeout=1800, snapshot_path=None, max_memory_bytes=None, measure_interval=60):
+        self.root = root
+        self.default_data_dir = default_data_dir
+        self.max_tenants = max_tenants
+        self.max_memory_bytes = max_memory_bytes
+        self.measure_interval = measure_interval
+        self.idle_timeout = idle_timeout
+        self.snapshot_path = snapshot_path
+        self.intent_detector = IntentDetector()
+        self._tenants = OrderedDict()
+        self._load_locks = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+    
+    def data_dir(self, tenant_id):
+        if tenant_id == DEFAULT_TENANT:
+            return self.default_data_dir
+        if not TENANT_ID_RE.match(tenant_id or ""):
+            raise ValueError(f"Invalid tenant ID: {tenant_id!r}")
+        return os.path.join(self.root, tenant_id)
+    
+    def list_tenants(self):
+        tenants = [DEFAULT_TENANT]
+        if os.path.isdir(self.root):
+            tenants += sorted(
+                name for name in os.listdir(self.root)
+                if TENANT_ID_RE.match(name) and name != DEFAULT_TENANT and os.path.isdir(os.path.join(self.root, name))
+            )
+        return tenants
+    
+    def _snapshot_path(self, tenant_id, data_dir):
+        return self.snapshot_path if tenant_id == DEFAULT_TENANT else default_snapshot_path(data_dir)
+    
+    def _load(self, tenant_id, data_dir):
+        if self.snapshot_path is None:
+            data_version = get_data_version(data_dir)
+            kb = KnowledgeBase(data_dir)
+        else:
+            kb = SnapshotKnowledgeBase.open(data_dir, self._snapshot_path(tenant_id, data_dir))
+            data_version = kb.version
+        entity_extractor = EntityExtractor(load_department_map(data_dir, kb))
+        tenant = Tenant(tenant_id, data_dir, kb, entity_extractor, self.intent_detector, data_version)
+        tenant.measure_memory()
+        return tenant
+    
+    def _is_current(self, tenant):
+        if self.snapshot_path is None:
+            return tenant.data_version == get_data_version(tenant.data_dir)
+        # In snapshot mode the header's version counter is the only thing checked per request
+        tenant.kb.refresh()
+        return tenant.data_version == tenant.kb.version
+    
+    def rebuild_snapshot(self, tenant_id=DEFAULT_TENANT):
+        if self.snapshot_path is None:
+            return None
+        data_dir = self.data_dir(tenant_id)
+        return ensure_snapshot(data_dir, self._snapshot_path(tenant_id, data_dir))
+    
+    def get(self, tenant_id=DEFAULT_TENANT):
+        data_dir = self.data_dir(tenant_id)
+        if not os.path.isdir(data_dir):
+            raise KeyError(f"Unknown tenant: {tenant_id}")
+        
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+            load_lock = self._load_locks.setdefault(tenant_id, threading.Lock())
+        if tenant is not None and self._is_current(tenant) and self._reuse(tenant):
+            return self._measure_if_due(tenant)
+        
+        # One loader per tenant; other requests for the same tenant wait for it instead of loading twice
+        with load_lock:
+            with self._lock:
+                tenant = self._tenants.get(tenant_id)
+            if tenant is not None and self._is_current(tenant) and self._reuse(tenant):
+                return self._measure_if_due(tenant)
+            
+            tenant = self._load(tenant_id, data_dir)
+            
+            with self._lock:
+                self.loads += 1
+                self._tenants[tenant_id] = tenant
+                self._touch(tenant)
+            # A load is already slow, so the other tenants' grown caches are re-measured here before a memory-based eviction
+            if self.max_memory_bytes is not None:
+                self.measure_memory()
+            with self._lock:
+                self._evict_locked()
+            return tenant
+    
+    def _reuse(self, tenant):
+        with self._lock:
+            # The tenant may have been evicted or replaced while its version was checked
+            if self._tenants.get(tenant.tenant_id) is not tenant:
+                return False
+            self._touch(tenant)
+            return True
+    
+    def _measure_if_due(self, tenant):
+        # Caches grow while a tenant serves queries, so its size is refreshed at most once per interval rather than per stats read
+        if time.monotonic() - tenant.measured_at >= self.measure_interval:
+            tenant.measure_memory()
+        return tenant
+    
+    def _touch(self, tenant):
+        tenant.last_used = time.monotonic()
+        tenant.requests += 1
+        self._tenants.move_to_end(tenant.tenant_id)
+        return tenant
+    
+    def _evict_locked(self):
+        now = time.monotonic()
+        for tenant_id in [t for t, tenant in self._tenants.items() if now - tenant.last_used > self.idle_timeout]:
+            del self._tenants[tenant_id]
+            self.evictions += 1
+        while len(self._tenants) > self.max_tenants:
+            self._tenants.popitem(last=False)
+            self.evictions += 1
+        # Uses the latest measurements; the most recently used tenant is always kept
+        while self.max_memory_bytes is not None and len(self._tenants) > 1 and sum(t.memory_bytes for t in self._tenants.values()) > self.max_memory_bytes:
+            self._tenants.popitem(last=False)
+            self.evictions += 1
+    
+    def measure_memory(self):
+        # Calendar schedules and NLU entries grow after load, so sizes are re-measured outside the registry lock
+        with self._lock:
+            tenants = list(self._tenants.values())
+        for tenant in tenants:
+            tenant.measure_memory()
+        return sum(tenant.memory_bytes for tenant in tenants)
+    
+    def evict_idle(self):
+        self.measure_memory()
+        with self._lock:
+            before = self.evictions
+            self._evict_locked()
+            return self.evictions - before
+    
+    def evict(self, tenant_id):
+        with self._lock:
+            if self._tenants.pop(tenant_id, None) is None:
+                return False
+            self.evictions += 1
+            return True
+    
+    def get_engine(self, tenant_id, llm, fallback=None, budget=None, response_format="text", rate_limiter=None):
+        return self.get(tenant_id).engine(llm, fallback, budget, response_format, rate_limiter)
+    
+    def get_stats(self):
+        now = time.monotonic()
+        with self._lock:
+            tenants = {
+                tenant_id: {
+                    "memory_bytes": tenant.memory_bytes,
+                    "requests": tenant.requests,
+                    "idle_s": round(now - tenant.last_used, 1),
+                    "departments": sorted(set(tenant.entity_extractor.department_codes))
+                }
+                for tenant_id, tenant in self._tenants.items()
+            }
+            return {
+                "loaded": len(tenants),
+                "max_tenants": self.max_tenants,
+                "max_memory_bytes": self.max_memory_bytes,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "memory_bytes": sum(t["memory_bytes"] for t in tenants.values()),
+                "tenants": tenants
+            }
@@ -1,4 +1,5 @@
 import sys
+import time
 
 def test_imports():
     try:
@@ -14,6 +15,18 @@ def test_imports():
         from llm_fallback import LLMFallback
         print("[OK] llm_fallback.py imported successfully")
         
+        import subprocess
+        heavy = ["streamlit", "requests", "openai", "dotenv", "concurrent.futures"]
+        result = subprocess.run(
+            [sys.executable, "-c", f"import sys, answer_engine, tenants, analytics; print([m for m in {heavy!r} if m in sys.modules])"],
+            capture_output=True, text=True
+        )
+        if result.returncode == 0 and result.stdout.strip() == "[]":
+            print("[OK] Answer engine imports without streamlit or LLM client libraries")
+        else:
+            print(f"[ERROR] Headless import pulled in heavy modules: {result.stdout.strip() or result.stderr.strip()}")
+            return False
+        
         return True
     except Exception as e:
         print(f"[ERROR] Import error: {e}")
@@ -33,11 +46,211 @@ def test_knowledge_base():
         depts = kb.get_all_departments()
         print(f"[OK] Found {len(depts)} departments: {', '.join(depts)}")
         
+        import os
+        import shutil
+        import tempfile
+        from knowledge_base import get_data_version
+        data_dir = os.path.join(tempfile.mkdtemp(), "data")
+        shutil.copytree("data", data_dir)
+        try:
+            before = get_data_version(data_dir)
+            unchanged = get_data_version(data_dir) == before
+            with open(os.path.join(data_dir, "holidays.json"), "a", encoding="utf-8") as f:
+                f.write("\n")
+            if unchanged and get_data_version(data_dir) != before:
+                print("[OK] Data version changes only when a data file is edited")
+            else:
+                print("[ERROR] Data version does not track data file edits, cached knowledge bases would go stale")
+                return False
+        finally:
+            shutil.rmtree(os.path.dirname(data_dir), ignore_errors=True)
+        
         return True
     except Exception as e:
         print(f"[ERROR] Knowledge base error: {e}")
         return False
 
+def test_kb_snapshot():
+    try:
+        import json
+        import os
+        import shutil
+        import tempfile
+        from knowledge_base import KnowledgeBase
+        from kb_snapshot import SnapshotKnowledgeBase, ensure_snapshot
+        data_dir = os.path.join(tempfile.mkdtemp(), "data")
+        shutil.copytree("data", data_dir)
+        
+        try:
+            kb = KnowledgeBase(data_dir)
+            snapshot = SnapshotKnowledgeBase.open(data_dir, check_interval=0)
+            same = (
+                snapshot.get_timetable("cse", "Semester 3") == kb.get_timetable("cse", "Semester 3")
+                and snapshot.get_exam_schedule("mid_semester", "CSE", "Semester 3") == kb.get_exam_schedule("mid_semester", "CSE", "Semester 3")
+                and snapshot.get_department_contact("ece") == kb.get_department_contact("ece")
+                and snapshot.get_all_departments() == kb.get_all_departments()
+                and snapshot.academic_rules == kb.academic_rules
+            )
+            if same:
+                print("[OK] Memory-mapped snapshot answers like the JSON knowledge base")
+            else:
+                print("[ERROR] Snapshot lookups differ from the JSON knowledge base")
+                return False
+            
+            holidays_path = os.path.join(data_dir, "holidays.json")
+            with open(holidays_path, "r", encoding="utf-8") as f:
+                holidays = json.load(f)
+            holidays.setdefault("2030", {})["01-02"] = "Snapshot Test Day"
+            with open(holidays_path, "w", encoding="utf-8") as f:
+                json.dump(holidays, f)
+            
+            if snapshot.check_holiday("2030-01-02") is None and snapshot.version == 1:
+                print("[OK] Workers do not rebuild the snapshot themselves")
+            else:
+                print(f"[ERROR] Worker rebuilt the snapshot: version {snapshot.version}")
+                return False
+            
+            ensure_snapshot(data_dir)
+            if snapshot.check_holiday("2030-01-02") == "Snapshot Test Day" and snapshot.version == 2:
+                print("[OK] Workers pick up a rebuilt snapshot through its version counter")
+            else:
+                print(f"[ERROR] Snapshot not refreshed: version {snapshot.version}")
+                return False
+            
+            import subprocess
+            worker = (
+                "import sys, time, kb_snapshot\n"
+                "build = kb_snapshot.build_snapshot\n"
+                "def slow_build(*args, **kwargs):\n"
+                "    print('built', flush=True)\n"
+                "    time.sleep(0.2)\n"
+                "    return build(*args, **kwargs)\n"
+                "kb_snapshot.build_snapshot = slow_build\n"
+                "time.sleep(max(0, float(sys.argv[2]) - time.time()))\n"
+                "kb_snapshot.ensure_snapshot(sys.argv[1])\n"
+            )
+            holidays.setdefault("2030", {})["01-03"] = "Concurrent Build Day"
+            with open(holidays_path, "w", encoding="utf-8") as f:
+                json.dump(holidays, f)
+            start_at = str(time.time() + 1.0)
+            workers = [subprocess.Popen([sys.executable, "-c", worker, data_dir, start_at], stdout=subprocess.PIPE, text=True) for _ in range(4)]
+            builds = sum(p.communicate()[0].count("built") for p in workers)
+            if builds == 1 and snapshot.check_holiday("2030-01-03") == "Concurrent Build Day" and snapshot.version == 3:
+                print("[OK] Concurrent worker processes build a changed snapshot once")
+            else:
+                print(f"[ERROR] {builds} worker processes rebuilt the snapshot, now at version {snapshot.version}")
+                return False
+            
+            from tenants import TenantRegistry
+            registry = TenantRegistry(root=os.path.dirname(data_dir), default_data_dir=data_dir, snapshot_path=os.path.join(data_dir, "kb.snapshot"))
+            tenant = registry.get()
+            tenant.kb.check_interval = 0
+            with open(holidays_path, "w", encoding="utf-8") as f:
+                json.dump(dict(holidays, **{"2031": {"01-02": "Second Test Day"}}), f)
+            unchanged = registry.get() is tenant
+            registry.rebuild_snapshot()
+            reloaded = registry.get()
+            if unchanged and reloaded is not tenant and reloaded.kb.check_holiday("2031-01-02") == "Second Test Day":
+                print("[OK] Tenants reload on a new snapshot version, not on every data file change")
+            else:
+                print(f"[ERROR] Unexpected tenant reloads in snapshot mode: {registry.loads}")
+                return False
+        finally:
+            shutil.rmtree(os.path.dirname(data_dir), ignore_errors=True)
+        
+        return True
+    except Exception as e:
+        print(f"[ERROR] KB snapshot error: {e}")
+        return False
+
+def test_tenants():
+    try:
+        import json
+        import os
+        import shutil
+        import tempfile
+        from tenants import TenantRegistry
+        root = tempfile.mkdtemp()
+        
+        try:
+            tenant_dir = os.path.join(root, "north")
+            shutil.copytree("data", tenant_dir)
+            with open(os.path.join(tenant_dir, "timetable.json"), "r", encoding="utf-8") as f:
+                timetable = json.load(f)
+            with open(os.path.join(tenant_dir, "timetable.json"), "w", encoding="utf-8") as f:
+                json.dump({"IT": timetable["CSE"]}, f)
+            with open(os.path.join(tenant_dir, "departments.json"), "w", encoding="utf-8") as f:
+                json.dump({"IT": ["information technology"]}, f)
+            
+            registry = TenantRegistry(root=root, max_tenants=1)
+            north = registry.get("north")
+            if north.entity_extractor.extract_department("information technology timetable") == "IT" and north.kb.get_all_departments() == ["IT"]:
+                print("[OK] Tenant uses its own knowledge base and department vocabulary")
+            else:
+                print("[ERROR] Tenant vocabulary not applied")
+                return False
+            
+            default = registry.get("default")
+            stats = registry.get_stats()
+            if default.entity_extractor.extract_department("cse") == "CSE" and list(stats["tenants"]) == ["default"] and stats["evictions"] == 1:
+                print("[OK] Least recently used tenant evicted when over the limit")
+            else:
+                print(f"[ERROR] Unexpected tenant registry state: {stats}")
+                return False
+            
+            if stats["tenants"]["default"]["memory_bytes"] > 0:
+                print(f"[OK] Tenant memory accounted: {stats['memory_bytes'] / 1024:.0f} KiB loaded")
+            else:
+                print("[ERROR] Tenant memory not accounted")
+                return False
+            
+            from datetime import date
+            loaded_bytes = stats["tenants"]["default"]["memory_bytes"]
+            default.calendar.get_day("CSE", "Semester 3", date(2025, 3, 12))
+            if registry.get_stats()["tenants"]["default"]["memory_bytes"] == loaded_bytes:
+                print("[OK] Stats report the last measurement without walking the tenants again")
+            else:
+                print("[ERROR] get_stats re-measured tenant memory")
+                return False
+            
+            grown_bytes = registry.measure_memory()
+            if grown_bytes > loaded_bytes:
+                print(f"[OK] Materialized calendar counted in tenant memory ({(grown_bytes - loaded_bytes) / 1024:.0f} KiB)")
+            else:
+                print(f"[ERROR] Tenant memory stuck at load-time size: {grown_bytes}")
+                return False
+            
+            registry.measure_interval = 0
+            default.nlu_cache.analyze("library timings")
+            if registry.get("default").memory_bytes > grown_bytes:
+                print("[OK] Tenant memory re-measured on use once the interval has passed")
+            else:
+                print("[ERROR] Tenant memory not re-measured after the interval")
+                return False
+            
+            registry = TenantRegistry(root=root, max_tenants=4, max_memory_bytes=grown_bytes)
+            registry.get("default").calendar.get_day("CSE", "Semester 3", date(2025, 3, 12))
+            registry.get("north")
+            if list(registry.get_stats()["tenants"]) == ["north"]:
+                print("[OK] Least recently used tenant evicted when over the memory budget")
+            else:
+                print(f"[ERROR] Memory budget not enforced: {registry.get_stats()}")
+                return False
+            
+            try:
+                registry.get("../data")
+                print("[ERROR] Path-like tenant ID was accepted")
+                return False
+            except ValueError:
+                print("[OK] Invalid tenant IDs are rejected")
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        
+        return True
+    except Exception as e:
+        print(f"[ERROR] Tenant registry error: {e}")
+        return False
+
 def test_intent_detection():
     try:
         from intent_detector import IntentDetector
@@ -81,11 +294,727 @@ def test_entity_extraction():
             else:
                 print(f"[WARN] Extracted dept='{dept}', sem='{sem}' from: '{query}'")
         
+        from datetime import date
+        from date_parser import parse_date
+        today = date(2025, 3, 12)
+        date_cases = [
+            ("Is 15/08/2025 a holiday?", date(2025, 8, 15)),
+            ("holiday on 2025-03-14", date(2025, 3, 14)),
+            ("Is 15 Aug a holiday?", date(2025, 8, 15)),
+            ("classes on March 17th", date(2025, 3, 17)),
+            ("what about next Friday", date(2025, 3, 21)),
+            ("plans this weekend", date(2025, 3, 15)),
+            ("Is 31/02/2025 a holiday?", None)
+        ]
+        for query, expected in date_cases:
+            parsed = parse_date(query, today)
+            if parsed == expected:
+                print(f"[OK] Parsed date {parsed} from: '{query}'")
+            else:
+                print(f"[ERROR] Parsed date {parsed} from: '{query}', expected {expected}")
+                return False
+        
         return True
     except Exception as e:
         print(f"[ERROR] Entity extraction error: {e}")
         return False
 
+def test_evaluation_corpus():
+    try:
+        from evaluate import load_corpus, evaluate, load_baseline, compare
+        
+        report = evaluate(load_corpus(), repeat=1)
+        baseline = load_baseline()
+        if baseline is None:
+            print("[ERROR] No eval_baseline.json - run python evaluate.py --save-baseline")
+            return False
+        regressions = compare(report, baseline, max_slowdown=None)
+        if regressions:
+            print(f"[ERROR] Accuracy regressions against eval_baseline.json: {regressions}")
+            return False
+        print(f"[OK] {report['queries']} labelled queries: intent accuracy {report['intent_accuracy']:.0%}, {report['answers']['passed']}/{report['answers']['checked']} answers match baseline")
+        
+        report["intents"]["exam"]["f1"] -= 0.1
+        if compare(report, baseline, max_slowdown=None):
+            print("[OK] A dropped intent F1 is reported as a regression")
+        else:
+            print("[ERROR] A dropped intent F1 was not reported")
+            return False
+        
+        return True
+    except Exception as e:
+        print(f"[ERROR] Evaluation corpus error: {e}")
+        return False
+
+def test_query_normalizer():
+    try:
+        from intent_detector import IntentDetector
+        from entity_extractor import EntityExtractor
+        from query_normalizer import QueryNormalizer
+        detector = IntentDetector()
+        extractor = EntityExtractor()
+        normalizer = QueryNormalizer.from_nlu(detector, extractor)
+        
+        test_queries = [
+            ("Show my timtable for CSE sem-3", "timetable"),
+            ("When is the exm?", "exam"),
+            ("Is tomorrow a holliday?", "holiday"),
+            ("Minimum attendence required?", "attendance"),
+        ]
+        
+        for query, expected_intent in test_queries:
+            normalized = normalizer.normalize(query)
+            intent, confidence = detector.detect_intent(normalized)
+            if intent == expected_intent:
+                print(f"[OK] Corrected '{query}' -> '{normalized}' ({intent})")
+            else:
+                print(f"[ERROR] '{query}' normalized to '{normalized}', detected '{intent}'")
+                return False
+        
+        unchanged = "is 15/08/2025 a holiday for cse sem 3"
+        if normalizer.normalize("Is 15/08/2025 a holiday for CSE sem 3?") == unchanged:
+            print("[OK] Dates, departments and semesters survive normalization")
+        else:
+            print(f"[ERROR] Normalization changed entities: {normalizer.normalize('Is 15/08/2025 a holiday for CSE sem 3?')}")
+            return False
+        
+        month_names = normalizer.normalize("Is May 1 a holiday or the coming sat?")
+        if month_names == "is may 1 a holiday or the coming sat":
+            print("[OK] Month and weekday names survive normalization")
+        else:
+            print(f"[ERROR] Date words spell-corrected away: {month_names}")
+            return False
+        
+        english = ["past", "held", "seek", "peek", "glass", "mass", "tile", "lime", "dime", "heat", "minimal"]
+        rewritten = {word: normalizer.normalize(word) for word in english if normalizer.normalize(word) != word}
+        if not rewritten:
+            print("[OK] Ordinary English words are not spell-corrected")
+        else:
+            print(f"[ERROR] Dictionary words rewritten: {rewritten}")
+            return False
+        
+        normalized = normalizer.normalize("What is the past paper policy")
+        intent, confidence = detector.detect_intent(normalized)
+        if normalized == "what is the past paper policy" and intent != "credits":
+            print(f"[OK] 'What is the past paper policy' kept as written ({intent})")
+        else:
+            print(f"[ERROR] 'What is the past paper policy' normalized to '{normalized}', detected '{intent}'")
+            return False
+        
+        normalizer.normalize("Show my timtable for CSE sem-3")
+        print(f"[OK] Normalizer cache stats: {normalizer.get_stats()}")
+        
+        return True
+    except Exception as e:
+        print(f"[ERROR] Query normalizer error: {e}")
+        return False
+
+def test_nlu_cache():
+    try:
+        from datetime import date, timedelta
+        from intent_detector import IntentDetector
+        from entity_extractor import EntityExtractor
+        from nlu_cache import NLUCache
+        cache = NLUCache(IntentDetector(), EntityExtractor(), maxsize=2)
+        
+        first = cache.analyze("who is hod of cse")
+        second = cache.analyze("who is hod of cse")
+        if first == second and cache.get_stats()["hits"] == 1:
+            print("[OK] Repeated query served from the NLU cache")
+        else:
+            print(f"[ERROR] Unexpected NLU cache result: {cache.get_stats()}")
+            return False
+        
+        cache.analyze("is tomorrow a holiday")
+        intent, confidence, entities, computed_on = cache._entries["is tomorrow a holiday"]
+        cache._entries["is tomorrow a holiday"] = (intent, confidence, {"date": "stale"}, computed_on - timedelta(days=1))
+        intent, confidence, entities = cache.analyze("is tomorrow a holiday")
+        if entities["date"] == date.today() + timedelta(days=1) and cache.get_stats()["expired"] == 1:
+            print("[OK] Relative-date entries expire at midnight")
+        else:
+            print(f"[ERROR] Relative-date entry not refreshed: {entities}")
+            return False
+        
+        cache.analyze("how many credits")
+        if cache.get_stats()["size"] == 2:
+            print("[OK] NLU cache stays within its size bound")
+        else:
+            print(f"[ERROR] NLU cache size is {cache.get_stats()['size']}, bound was 2")
+            return False
+        
+        return True
+    except Exception as e:
+        print(f"[ERROR] NLU cache error: {e}")
+        return False
+
+def test_academic_calendar():
+    try:
+        from knowledge_base import KnowledgeBase
+        from academic_calendar import CalendarMaterializer
+        kb = KnowledgeBase()
+        calendar = CalendarMaterializer(kb)
+        
+        holiday = calendar.get_day("CSE", "Semester 3", "2025-03-14")
+        if holiday and holiday["holiday"] == kb.check_holiday("2025-03-14") and not holiday["classes"]:
+            print(f"[OK] Dated lookup knows {holiday['date']} is a holiday ({holiday['holiday']})")
+        else:
+            print(f"[ERROR] Holiday not joined into the calendar: {holiday}")
+            return False
+        
+        exam_day = calendar.get_day("cse", "Semester 3", "2024-09-16")
+        if exam_day and exam_day["exams"] and exam_day["exams"][0]["exam_type"] == "mid_semester":
+            print("[OK] Exam ranges are joined into the dated schedule")
+        else:
+            print(f"[ERROR] Exam not found on 2024-09-16: {exam_day}")
+            return False
+        
+        week = calendar.get_week("CSE", "Semester 3", "2025-03-12")
+        if week and week[0]["date"].isoformat() == "2025-03-10" and week[0]["classes"] == kb.get_timetable("CSE", "Semester 3", "Monday"):
+            print("[OK] Week lookup starts on Monday and matches the weekly timetable")
+        else:
+            print("[ERROR] Unexpected week lookup result")
+            return False
+        
+        stats = calendar.get_stats()
+        if stats["schedules"] == 1 and stats["misses"] == 1:
+            print(f"[OK] Schedule materialized once ({stats['days']} days) and reused")
+        else:
+            print(f"[ERROR] Calendar was materialized more than once: {stats}")
+            return False
+        
+        return True
+    except Exception as e:
+        print(f"[ERROR] Academic calendar error: {e}")
+        return False
+
+def test_response_templates():
+    try:
+        import json
+        from response_templates import render
+        
+        values = {"day": "Monday", "classes": ["CS301 - Data Structures", "CS302 - DBMS"]}
+        text = render("timetable_day", values)
+        markdown = render("timetable_day", values, "markdown")
+        if text == "Classes on Monday:\n  CS301 - Data Structures\n  CS302 - DBMS" and "- CS302 - DBMS" in markdown:
+            print("[OK] Timetable rendered as text and markdown")
+        else:
+            print(f"[ERROR] Unexpected timetable rendering: {text!r}")
+            return False
+        
+        payload = json.loads(render("timetable_day", values, "json"))
+        if payload == {"type": "timetable_day", **values}:
+            print("[OK] JSON format returns the structured fields")
+        else:
+            print(f"[ERROR] Unexpected JSON rendering: {payload}")
+            return False
+        
+        from response_templates import COMPILED_TEMPLATES
+        compiled = sum(len([templates[name] for name in templates.sources]) for templates in COMPILED_TEMPLATES.values())
+        print(f"[OK] All {compiled} templates compile")
+        
+        contact = render("contact", {"department": "CSE", "HOD": "Dr. Rao"})
+        if "HOD: Dr. Rao" in contact and "Email: N/A" in contact:
+            print("[OK] Missing fields rendered as N/A")
+        else:
+            print(f"[ERROR] Missing fields not handled: {contact!r}")
+            return False
+        
+        return True
+    except Exception as e:
+        print(f"[ERROR] Response template error: {e}")
+        return False
+
+def test_kb_retriever():
+    try:
+        from knowledge_base import KnowledgeBase
+        from kb_retriever import KBRetriever
+        from token_budget import estimate_tokens
+        retriever = KBRetriever(KnowledgeBase())
+        print(f"[OK] Indexed {len(retriever.chunks)} knowledge base snippets")
+        
+        test_queries = [
+            ("How do I get my hall ticket?", "hall ticket"),
+            ("When is Diwali?", "Diwali"),
+            ("Phone number of ECE department", "ECE department contact"),
+        ]
+        
+        for query, expected in test_queries:
+            results = retriever.search(query, top_k=1)
+            if results and expected in results[0][1]:
+                print(f"[OK] Retrieved '{expected}' snippet for: '{query}'")
+            else:
+                print(f"[ERROR] Top snippet for '{query}' was: {results[0][1] if results else None}")
+                return False
+        
+        context = retriever.build_context("CSE timetable", top_k=10, token_budget=50)
+        if estimate_tokens(context) <= 50:
+            print("[OK] Retrieved context stays within the token budget")
+        else:
+            print(f"[ERROR] Retrieved context uses {estimate_tokens(context)} tokens, budget was 50")
+            return False
+        
+        results = retriever.search("CSE timetable", top_k=10)
+        top_cost = estimate_tokens(results[0][1])
+        smaller = next(chunk for score, chunk in results[1:] if estimate_tokens(chunk) < top_cost)
+        context = retriever.build_context("CSE timetable", top_k=10, token_budget=estimate_tokens(smaller))
+        if results[0][1] not in context and smaller in context:
+            print("[OK] Lower-ranked snippets fill the budget left by an oversized one")
+        else:
+            print(f"[ERROR] Budget not filled past an oversized snippet: {context!r}")
+            return False
+        
+        return True
+    except Exception as e:
+        print(f"[ERROR] KB retriever error: {e}")
+        return False
+
+def test_token_budget():
+    try:
+        from token_budget import TokenBudget, estimate_tokens
+        budget = TokenBudget(max_prompt_tokens=60, history_tokens=40, recent_turns=2)
+        
+        messages = []
+        for i in range(10):
+            messages.append({"role": "user", "content": f"Question number {i} about the CSE timetable for semester 3"})
+            messages.append({"role": "assistant", "content": "Classes on Monday: DSA, Math, Physics " * 5})
+        
+        history = budget.fit_history(messages)
+        if estimate_tokens(history) <= 40 and history.startswith("Earlier the user asked"):
+            print(f"[OK] History of {len(messages)} messages summarized into {estimate_tokens(history)} tokens")
+        else:
+            print(f"[ERROR] History not fitted to budget ({estimate_tokens(history)} tokens): {history[:80]}")
+            return False
+        
+        context = budget.fit_prompt("You are a helpdesk assistant.", "When is Diwali?", "holiday info " * 200)
+        if estimate_tokens(context) <= 60:
+            print("[OK] Prompt context truncated to the configured budget")
+        else:
+            print(f"[ERROR] Prompt context uses {estimate_tokens(context)} tokens, budget was 60")
+            return False
+        
+        return True
+    except Exception as e:
+        print(f"[ERROR] Token budget error: {e}")
+        return False
+
+def test_llm_backends():
+    try:
+        from llm_backends import get_available_backends
+        from llm_fallback import LLMFallback
+        from llm_dispatcher import LLMDispatcher
+        
+        backends = get_available_backends()
+        print(f"[OK] Registered LLM backends: {', '.join(backends)}")
+        
+        llm = LLMFallback(provider="stub", model="echo")
+        first = llm.get_response("Where is the library?", "Department: CSE")
+        second = llm.get_response("Where is the library?", "Department: CSE")
+        if llm.is_available() and first == second and "Where is the library?" in first:
+            print("[OK] Stub backend answers deterministically without network access")
+        else:
+            print(f"[ERROR] Stub backend returned: {first!r} / {second!r}")
+            return False
+        
+        dispatcher = LLMDispatcher(LLMFallback(provider="stub", model="echo", latency=0.1), batch_size=8)
+        results = run_concurrently(dispatcher.get_response, [(f"question {i}", None) for i in range(6)])
+        stats = dispatcher.get_stats()
+        if all(f"question {i}" in r for i, r in enumerate(results)) and stats["batches"] < 6:
+            print(f"[OK] Stub backend served 6 queries in {stats['batches']} micro-batch(es)")
+        else:
+            print(f"[ERROR] Unexpected stub batching stats: {stats}")
+            return False
+        
+        if not LLMFallback(provider="unknown").is_available():
+            print("[OK] Unknown provider reported as unavailable")
+        else:
+            print("[ERROR] Unknown provider reported as available")
+            return False
+        
+        return True
+    except Exception as e:
+        print(f"[ERROR] LLM backend error: {e}")
+        return False
+
+def test_kb_first_fallback():
+    try:
+        from kb_first_fallback import KBFirstFallback
+        from knowledge_base import KnowledgeBase
+        from kb_retriever import KBRetriever
+        from llm_fallback import LLMFallback
+        
+        retriever = KBRetriever(KnowledgeBase())
+        llm = LLMFallback(provider="stub", model="echo", latency=0.5)
+        fallback = KBFirstFallback()
+        
+        start = time.perf_counter()
+        result, source = fallback.run(
+            lambda: llm.get_response("How do I get my hall ticket?"),
+            lambda: retriever.find_confident_matches("How do I get my hall ticket?") or None
+        )
+        elapsed = time.perf_counter() - start
+        if source == "kb" and elapsed < 0.5:
+            print(f"[OK] Relaxed KB match answered in {elapsed * 1000:.1f} ms without waiting for the LLM")
+        else:
+            print(f"[ERROR] Expected the KB to answer, got {source} after {elapsed:.2f}s")
+            return False
+        
+        if llm.get_usage_stats()["calls"] == 0:
+            print("[OK] LLM backend not called when the relaxed KB match answers")
+        else:
+            print(f"[ERROR] LLM backend called on a KB answer: {llm.get_usage_stats()}")
+            return False
+        
+        result, source = fallback.run(
+            lambda: llm.get_response("Where is the canteen?"),
+            lambda: retriever.find_confident_matches("Where is the canteen?") or None
+        )
+        if source == "llm" and "canteen" in result:
+            print("[OK] LLM answer used when no relaxed KB match qualifies")
+        else:
+            print(f"[ERROR] Expected LLM to answer, got {source}: {result}")
+            return False
+        
+        result, source = fallback.run(lambda: llm.get_response("Where is the gym?"), lambda: None, admit=lambda: False)
+        if source == "refused" and llm.get_usage_stats()["calls"] == 1:
+            print("[OK] LLM not dispatched when admission is refused")
+        else:
+            print(f"[ERROR] Refused query reached the LLM: {source}")
+            return False
+        
+        from answer_engine import AnswerEngine
+        from rate_limiter import RateLimiter
+        limiter = RateLimiter(session_per_minute=None)
+        engine = AnswerEngine.create(provider="stub", latency=0.3, rate_limiter=limiter)
+        sources = [engine.answer(q, {})["source"] for q in ["When is Diwali?", "How do I get my hall ticket?"]]
+        usage = engine.llm.llm.get_usage_stats()
+        if sources == ["relaxed_kb", "relaxed_kb"] and usage["calls"] == 0 and limiter.get_stats()["allowed"] == 0:
+            print("[OK] Engine KB answers spend no LLM call and no rate limit token")
+        else:
+            print(f"[ERROR] KB answers still reached the LLM: sources={sources}, usage={usage}, limiter={limiter.get_stats()}")
+            return False
+        
+        stats = fallback.get_stats()
+        print(f"[OK] Fallback stats: {stats['kb_answers']} KB answers, {stats['llm_answers']} LLM answers")
+        
+        return True
+    except Exception as e:
+        print(f"[ERROR] KB-first fallback error: {e}")
+        return False
+
+def test_rate_limiter():
+    try:
+        from rate_limiter import RateLimiter
+        from answer_engine import AnswerEngine
+        
+        now = [0.0]
+        limiter = RateLimiter(session_per_minute=60, session_burst=2, global_per_minute=60, global_burst=3, clock=lambda: now[0])
+        allowed = [limiter.allow("alice") for _ in range(3)]
+        now[0] = 1.0
+        if allowed == [True, True, False] and limiter.allow("alice"):
+            print("[OK] Session bucket allows a burst of 2 and refills at 1 call/s")
+        else:
+            print(f"[ERROR] Unexpected session limiting: {allowed}")
+            return False
+        
+        refused = limiter.allow("bob") and not limiter.allow("bob")
+        now[0] = 2.0
+        if refused and limiter.get_stats()["global_limited"] == 1 and limiter.allow("bob"):
+            print("[OK] Global bucket limits all sessions without charging the refused session")
+        else:
+            print(f"[ERROR] Unexpected global limiting: {limiter.get_stats()}")
+            return False
+        
+        engine = AnswerEngine.create(provider="stub", model="echo", latency=0, rate_limiter=RateLimiter(session_per_minute=1, session_burst=1))
+        first = engine.answer("Tell me a joke", {}, session_id="s1")
+        second = engine.answer("Tell me a joke", {}, session_id="s1")
+        kb = engine.answer("Who is HOD of CSE?", {}, session_id="s1")
+        if first["source"] == "llm" and second["source"] == "rate_limited" and "rephrasing" in second["response"] and kb["source"] == "kb":
+            print("[OK] Over-budget fallback queries degrade to the rephrase message; KB answers are unaffected")
+        else:
+            print(f"[ERROR] Unexpected rate-limited sources: {first['source']}, {second['source']}, {kb['source']}")
+            return False
+        
+        return True
+    except Exception as e:
+        print(f"[ERROR] Rate limiter error: {e}")
+        return False
+
+def test_analytics():
+    try:
+        import os
+        import shutil
+        import tempfile
+        from analytics import AnalyticsLog, AnalyticsRollup
+        root = tempfile.mkdtemp()
+        
+        try:
+            path = os.path.join(root, "analytics.jsonl")
+            log = AnalyticsLog(path)
+            kb_answer = {"source": "kb", "intent": "contact", "confidence": 0.9, "entities": {"department": "CSE"}, "normalized_query": "who is hod of cse"}
+            unanswered = {"source": "unavailable", "intent": None, "confidence": 0.0, "entities": {}, "normalized_query": "wifi password"}
+            for answer in [kb_answer, unanswered, unanswered]:
+                log.record("default", "s1", answer["normalized_query"], answer, 0.004)
+            log.flush()
+            
+            rollup = AnalyticsRollup(path)
+            applied = rollup.update()
+            summary = rollup.summary("default")
+            if applied == 3 and summary["intents"] == {"None": 2, "contact": 1} and summary["top_unanswered"] == [("wifi password", 2)]:
+                print("[OK] Events rolled up into intent mix and top unanswered queries")
+            else:
+                print(f"[ERROR] Unexpected rollup: applied={applied}, summary={summary}")
+                return False
+            
+            with open(path, "a", encoding="utf-8") as f:
+                f.write('{"ts": 1')
+            resumed = AnalyticsRollup(path)
+            if resumed.update() == 0 and resumed.summary("default")["events"] == 3:
+                print("[OK] Rollup resumes from its checkpoint and skips partial lines")
+            else:
+                print("[ERROR] Rollup checkpoint not resumed")
+                return False
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        
+        return True
+    except Exception as e:
+        print(f"[ERROR] Analytics error: {e}")
+        return False
+
+def test_load_generator():
+    try:
+        import json
+        import os
+        import tempfile
+        from answer_engine import AnswerEngine
+        from load_generator import load_trace, run_load, summarize, synthetic_trace
+        engine = AnswerEngine.create(provider="stub", model="echo", latency=0)
+        
+        results, elapsed, sessions = run_load(engine, synthetic_trace(60, 6))
+        report = summarize(results, elapsed, sessions)
+        if report["queries"] == 60 and report["sessions"] <= 6:
+            print(f"[OK] Synthetic load: {report['throughput_qps']:.0f} queries/s, p95 {report['latency_ms']['p95']:.2f} ms, fallback rate {report['fallback_rate']:.0%}")
+        else:
+            print(f"[ERROR] Unexpected synthetic load report: {report}")
+            return False
+        
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+            for record in [
+                {"session": "a", "role": "user", "content": "What is the timetable for CSE sem 3?"},
+                {"session": "a", "role": "assistant", "content": "Weekly Timetable: ..."},
+                {"session": "a", "role": "user", "content": "What about Tuesday?"},
+            ]:
+                f.write(json.dumps(record) + "\n")
+        trace = load_trace(f.name, sessions=1)
+        os.unlink(f.name)
+        
+        results, elapsed, sessions = run_load(engine, trace)
+        if len(results) == 2 and all(r["intent"] == "timetable" and r["source"] == "kb" for r in results):
+            print("[OK] Replayed trace carries conversation context across turns")
+        else:
+            print(f"[ERROR] Unexpected replay results: {results}")
+            return False
+        
+        return True
+    except Exception as e:
+        print(f"[ERROR] Load generator error: {e}")
+        return False
+
+def test_streaming():
+    try:
+        from answer_engine import AnswerEngine
+        engine = AnswerEngine.create(provider="stub", model="echo", latency=0.2)
+        
+        start = time.perf_counter()
+        result = engine.answer("Where is the canteen?", {}, stream=True)
+        chunks = iter(result["response"])
+        first_chunk = next(chunks)
+        first_chunk_time = time.perf_counter() - start
+        streamed = first_chunk + "".join(chunks)
+        
+        expected = engine.get_answer("Where is the canteen?", {})
+        if result["source"] == "llm" and streamed == expected and first_chunk_time < 0.2:
+            print(f"[OK] First streamed chunk after {first_chunk_time * 1000:.0f} ms, full answer matches non-streamed reply")
+        else:
+            print(f"[ERROR] Streamed {streamed!r} ({result['source']}) vs {expected!r}, first chunk after {first_chunk_time:.2f}s")
+            return False
+        
+        result = engine.answer("Who is HOD of CSE?", {}, stream=True)
+        if isinstance(result["response"], str) and result["source"] == "kb":
+            print("[OK] KB answers are returned as plain text for chunked rendering")
+        else:
+            print(f"[ERROR] Unexpected KB streaming result: {result['source']}")
+            return False
+        
+        return True
+    except Exception as e:
+        print(f"[ERROR] Streaming error: {e}")
+        return False
+
+def start_stub_ollama_server(delay=0.3):
+    import json
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    hits = {"generate": 0, "last_payload": None}
+    
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self._send({"models": [{"name": "stub"}]})
+        
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            hits["generate"] += 1
+            hits["last_payload"] = payload
+            time.sleep(delay)
+            self._send({"response": f"stub answer for {payload.get('model')}", "prompt_eval_count": 42, "eval_count": 7})
+        
+        def _send(self, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, hits
+
+def run_concurrently(fn, args_list):
+    import threading
+    
+    results = [None] * len(args_list)
+    
+    def worker(i, args):
+        results[i] = fn(*args)
+    
+    threads = [threading.Thread(target=worker, args=(i, args)) for i, args in enumerate(args_list)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+def test_llm_dispatcher():
+    try:
+        from llm_dispatcher import LLMDispatcher
+        from llm_fallback import LLMFallback
+        
+        try:
+            import requests
+        except ImportError:
+            requests = None
+        
+        if requests:
+            server, hits = start_stub_ollama_server()
+            url = f"http://127.0.0.1:{server.server_address[1]}"
+            dispatcher = LLMDispatcher(LLMFallback(provider="ollama", model="stub", base_url=url))
+            
+            results = run_concurrently(dispatcher.get_response, [("What is the library timing?", "CSE")] * 8)
+            server.shutdown()
+            
+            if hits["generate"] == 1 and len(set(results)) == 1:
+                print("[OK] 8 identical concurrent queries coalesced into 1 stub server call")
+            else:
+                print(f"[ERROR] Stub server received {hits['generate']} calls for 8 identical queries")
+                return False
+            
+            options = (hits["last_payload"] or {}).get("options", {})
+            usage = dispatcher.llm.get_usage_stats()
+            if options.get("num_predict") and usage["prompt_tokens"] == 42 and usage["response_tokens"] == 7:
+                print(f"[OK] Ollama request capped at num_predict={options['num_predict']} and token usage recorded")
+            else:
+                print(f"[ERROR] Unexpected Ollama options {options} or usage {usage}")
+                return False
+        else:
+            print("[WARN] requests not installed - skipping stub server check")
+        
+        class SlowBatchLLM:
+            supports_batching = True
+            
+            def __init__(self):
+                self.batches = []
+            
+            def get_response(self, query, context=None):
+                time.sleep(0.2)
+                return f"answer: {query}"
+            
+            def get_batch_response(self, items):
+                time.sleep(0.2)
+                self.batches.append(len(items))
+                return [f"answer: {query}" for query, context in items]
+            
+            def is_available(self):
+                return True
+        
+        llm = SlowBatchLLM()
+        dispatcher = LLMDispatcher(llm, max_concurrency=1, max_queue=2, batch_size=4, batch_window=0.1)
+        queries = [(f"question {i % 3}", None) for i in range(6)]
+        results = run_concurrently(dispatcher.get_response, queries)
+        
+        if all(r == f"answer: {q}" for r, (q, c) in zip(results, queries)) and sum(llm.batches) == 3:
+            print(f"[OK] Distinct queries micro-batched into batches of {llm.batches}")
+        else:
+            print(f"[ERROR] Unexpected batching: batches={llm.batches}, stats={dispatcher.get_stats()}")
+            return False
+        
+        import threading
+        from llm_dispatcher import PRIORITY_KB, PRIORITY_OPEN
+        llm = SlowBatchLLM()
+        llm.supports_batching = False
+        order = []
+        dispatcher = LLMDispatcher(llm, max_concurrency=1)
+        
+        def ask(query, priority):
+            dispatcher.get_response(query, priority=priority)
+            order.append(query)
+        
+        threads = [threading.Thread(target=ask, args=("first", PRIORITY_OPEN))]
+        threads[0].start()
+        time.sleep(0.05)
+        for query, priority in [("open", PRIORITY_OPEN), ("kb", PRIORITY_KB)]:
+            threads.append(threading.Thread(target=ask, args=(query, priority)))
+            threads[-1].start()
+            time.sleep(0.05)
+        for t in threads:
+            t.join()
+        if order == ["first", "kb", "open"]:
+            print("[OK] Queries with KB context get the next free LLM slot first")
+        else:
+            print(f"[ERROR] Unexpected dispatch order: {order}")
+            return False
+        
+        llm = SlowBatchLLM()
+        llm.supports_batching = False
+        dispatcher = LLMDispatcher(llm)
+        histories = [("what about tomorrow", None, PRIORITY_OPEN, f"User: when is the {topic} exam") for topic in ["math", "math", "physics", "physics"]]
+        run_concurrently(dispatcher.get_response, histories)
+        stats = dispatcher.get_stats()
+        if stats["dispatched"] == 2 and stats["coalesced"] == 2:
+            print("[OK] Follow-ups coalesce only within the same conversation history")
+        else:
+            print(f"[ERROR] Follow-ups with different histories shared an LLM call: {stats}")
+            return False
+        
+        dispatcher = LLMDispatcher(SlowBatchLLM(), max_concurrency=1, max_queue=1)
+        results = run_concurrently(dispatcher.get_response, [(f"question {i}", None) for i in range(4)])
+        rejected = dispatcher.get_stats()["rejected"]
+        if rejected == 2:
+            print("[OK] Bounded queue rejected overflow queries with a busy message")
+        else:
+            print(f"[ERROR] Expected 2 rejected queries, got {rejected}")
+            return False
+        
+        return True
+    except Exception as e:
+        print(f"[ERROR] LLM dispatcher error: {e}")
+        return False
+
 if __name__ == "__main__":
     print("=" * 50)
     print("College Helpdesk Chatbot - Setup Test")
@@ -102,6 +1031,14 @@ if __name__ == "__main__":
     all_passed &= test_knowledge_base()
     print()
     
+    print("Testing KB snapshot...")
+    all_passed &= test_kb_snapshot()
+    print()
+    
+    print("Testing tenant registry...")
+    all_passed &= test_tenants()
+    print()
+    
     print("Testing intent detection...")
     all_passed &= test_intent_detection()
     print()
@@ -110,12 +1047,69 @@ if __name__ == "__main__":
     all_passed &= test_entity_extraction()
     print()
     
+    print("Testing evaluation corpus...")
+    all_passed &= test_evaluation_corpus()
+    print()
+    
+    print("Testing query normalizer...")
+    all_passed &= test_query_normalizer()
+    print()
+    
+    print("Testing NLU cache...")
+    all_passed &= test_nlu_cache()
+    print()
+    
+    print("Testing academic calendar...")
+    all_passed &= test_academic_calendar()
+    print()
+    
+    print("Testing response templates...")
+    all_passed &= test_response_templates()
+    print()
+    
+    print("Testing KB retriever...")
+    all_passed &= test_kb_retriever()
+    print()
+    
+    print("Testing token budget...")
+    all_passed &= test_token_budget()
+    print()
+    
+    print("Testing LLM backends...")
+    all_passed &= test_llm_backends()
+    print()
+    
+    print("Testing KB-first fallback...")
+    all_passed &= test_kb_first_fallback()
+    print()
+    
+    print("Testing rate limiter...")
+    all_passed &= test_rate_limiter()
+    print()
+    
+    print("Testing analytics...")
+    all_passed &= test_analytics()
+    print()
+    
+    print("Testing load generator...")
+    all_passed &= test_load_generator()
+    print()
+    
+    print("Testing streaming...")
+    all_passed &= test_streaming()
+    print()
+    
+    print("Testing LLM dispatcher...")
+    all_passed &= test_llm_dispatcher()
+    print()
+    
     print("=" * 50)
     if all_passed:
         print("[OK] All tests passed! Setup looks good.")
     else:
-        print("[WARN] Some tests had warnings. Check the output above.")
+        print("[ERROR] Some tests failed. Check the output above.")
     print("=" * 50)
     print()
     print("To run the chatbot:")
     print("  streamlit run app.py")
+    sys.exit(0 if all_passed else 1)
@@ -0,0 +1,76 @@
+import re
+
+
+WORD_RE = re.compile(r"\w+|[^\w\s]")
+TRUNCATION_MARK = " ..."
+
+
+def estimate_tokens(text):
+    if not text:
+        return 0
+    return max(len(WORD_RE.findall(text)), len(text) // 4)
+
+
+def truncate_to_tokens(text, max_tokens):
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    
+    words = text.split()
+    low, high = 0, len(words)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(" ".join(words[:mid]) + TRUNCATION_MARK) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    
+    if low == 0:
+        return ""
+    return " ".join(words[:low]) + TRUNCATION_MARK
+
+
+class TokenBudget:
+    def __init__(self, max_prompt_tokens=600, max_response_tokens=200, context_window=2048,
+                 knowledge_tokens=200, history_tokens=150, recent_turns=4):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_response_tokens = max_response_tokens
+        self.context_window = context_window
+        self.knowledge_tokens = knowledge_tokens
+        self.history_tokens = history_tokens
+        self.recent_turns = recent_turns
+    
+    def fit_history(self, messages, max_tokens=None):
+        if max_tokens is None:
+            max_tokens = self.history_tokens
+        if not messages:
+            return ""
+        
+        recent = messages[-self.recent_turns:]
+        older = messages[:-self.recent_turns]
+        
+        per_message = max_tokens // (len(recent) + 1)
+        lines = []
+        used = 0
+        for msg in reversed(recent):
+            role = "User" if msg["role"] == "user" else "Bot"
+            line = truncate_to_tokens(f"{role}: {msg['content']}", min(per_message, max_tokens - used))
+            if not line:
+                break
+            lines.append(line)
+            used += estimate_tokens(line)
+        lines.reverse()
+        
+        older_questions = [msg["content"] for msg in older if msg["role"] == "user"]
+        if older_questions and used < max_tokens:
+            topics = "; ".join(" ".join(q.split()[:8]) for q in older_questions[-3:])
+            summary = truncate_to_tokens(f"Earlier the user asked: {topics}", max_tokens - used)
+            if summary:
+                lines.insert(0, summary)
+        
+        return "\n".join(lines)
+    
+    def fit_prompt(self, base_prompt, query, context):
+        remaining = self.max_prompt_tokens - estimate_tokens(base_prompt) - estimate_tokens(query)
+        return truncate_to_tokens(context, remaining)